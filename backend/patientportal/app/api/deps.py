@@ -1,4 +1,5 @@
-from typing import AsyncGenerator, Optional, List
+from dataclasses import dataclass
+from typing import AsyncGenerator, Optional, List, Union
 from fastapi import WebSocket, HTTPException, Depends, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
@@ -9,9 +10,17 @@ from app.core.config import settings
 from app.crud import crud_user
 from app.models.user import User
 from app.core.roles import Role
+from app.core.principal_cache import principal_cache
+from app.core.token_revocation import token_revocations
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
+@dataclass
+class TokenPrincipal:
+    # Caller authorized from verified JWT claims, without loading the user row
+    id: int
+    role: Role
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         try:
@@ -40,9 +49,15 @@ async def _decode_and_get_user(
         if not user_id:
             raise ValueError("Invalid token payload")
         
-        user = await crud_user.get(db, id=int(user_id))
-        if not user:
-            raise ValueError("User not found")
+        user_id = int(user_id)
+        user = principal_cache.get(user_id)
+        if user is None:
+            user = await crud_user.get(db, id=user_id)
+            if not user:
+                raise ValueError("User not found")
+            # Detach so a rollback of this session can't expire the cached copy
+            db.expunge(user)
+            principal_cache.set(user_id, user)
         return user
 
     except (JWTError, ValidationError, ValueError) as e:
@@ -67,8 +82,46 @@ async def get_optional_current_user(
 ) -> Optional[User]:
     return await _decode_and_get_user(db, token, raise_on_invalid=False)
 
+def _principal_from_claims(token: Optional[str]) -> Optional[TokenPrincipal]:
+    # Returns None when the claims alone can't be trusted and the user must be loaded
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        user_id = int(payload.get("sub"))
+        role = Role(payload.get("role"))
+    except (JWTError, TypeError, ValueError):
+        return None
+
+    version = payload.get("ver")
+    issued_at = payload.get("iat")
+    if version is None or issued_at is None or issued_at < token_revocations.started_at:
+        # Issued before this process started, so revocations may have been lost
+        return None
+    current = token_revocations.version(user_id)
+    if version > current:
+        # Revoked on another worker and the event hasn't arrived here yet
+        return None
+    if version < current:
+        # Deleted user or role change since the token was issued
+        token_revocations.rejected += 1
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return TokenPrincipal(id=user_id, role=role)
+
 def require_roles(required_roles: List[Role]):
-    async def role_checker(current_user: User = Depends(get_current_user)):
+    async def role_checker(
+        db: AsyncSession = Depends(get_db),
+        token: str = Depends(oauth2_scheme)
+    ) -> Union[User, TokenPrincipal]:
+        current_user = None
+        if settings.AUTH_STATELESS_ROLES:
+            current_user = _principal_from_claims(token)
+        if current_user is None:
+            current_user = await _decode_and_get_user(db, token, raise_on_invalid=True)
         if current_user.role not in required_roles:
             raise HTTPException(
                 status_code=403,
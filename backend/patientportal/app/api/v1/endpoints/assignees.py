@@ -1,5 +1,5 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.deps import get_db, get_current_user, require_roles
 from app.crud.crud_assignee import crud_assignee
@@ -11,6 +11,7 @@ from app.schemas.request import Status
 from app.core.roles import Role
 from sqlalchemy import select, func
 from app.core.config import settings
+from .requests import get_date_range, parse_date_with_timezone
 
 router = APIRouter()
 
@@ -18,6 +19,9 @@ router = APIRouter()
 async def get_assignee_stats(
     skip: int = 0,
     limit: int = settings.MAX_FETCH_LIMIT,
+    start_date: str = None,
+    end_date: str = None,
+    order: str = "id",
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_roles([Role.ADMIN, Role.VERIFIER]))
 ):
@@ -27,27 +31,18 @@ async def get_assignee_stats(
             status_code=400,
             detail=f"Limit must be less than or equal to {settings.MAX_FETCH_LIMIT}"
         )
-    
-    # Get all assignees (limit to avoid large queries)
-    query = select(Assignee).offset(skip).limit(limit)
-    result = await db.execute(query)
-    assignees = result.scalars().all()
-    
-    stats = []
-    for assignee in assignees:
-        # Base query for this assignee's completed requests
-        query = select(func.count()).select_from(Request).where(
-            Request.assigned_to == assignee.id,
-            Request.status == Status.COMPLETED
-        )
-        result = await db.execute(query)
-        completed = result.scalar() or 0
-        
-        stats.append(AssigneeStats(
-            full_name=assignee.full_name,
-            completed=completed,
-        ))
 
+    # The window is on completion time, an end date covers that whole day
+    start = parse_date_with_timezone(start_date)
+    end = parse_date_with_timezone(end_date)
+    if end is not None:
+        _, end = get_date_range(end)
+    try:
+        stats = await crud_assignee.get_leaderboard(
+            db, skip=skip, limit=limit, start=start, end=end, order=order
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {"stats": stats}
 
 @router.post("/", response_model=AssigneeResponse)
@@ -62,6 +57,9 @@ async def create_assignee(
 async def read_assignees(
     skip: int = 0,
     limit: int = settings.MAX_FETCH_LIMIT,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    estimate_total: bool = False,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_roles([Role.ADMIN, Role.VERIFIER]))
 ):
@@ -70,7 +68,19 @@ async def read_assignees(
             status_code=400,
             detail=f"Limit must be less than or equal to {settings.MAX_FETCH_LIMIT}"
         )
-    return await crud_assignee.get_multi(db, skip=skip, limit=limit)
+    try:
+        # Encoded straight from the rows, same JSON as the response model
+        content = await crud_assignee.get_multi_json(
+            db,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            include_total=include_total,
+            estimate_total=estimate_total,
+        )
+        return Response(content=content, media_type="application/json")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{assignee_id}", response_model=AssigneeResponse)
 async def read_assignee(
@@ -99,7 +109,12 @@ async def update_assignee(
             status_code=404,
             detail="Assignee not found"
         )
-    assignee = await crud_assignee.update(db=db, db_obj=assignee, obj_in=assignee_in)
+    assignee = await crud_assignee.update(db=db, db_obj=assignee, obj_in=assignee_in, fast=True)
+    if not assignee:
+        raise HTTPException(
+            status_code=404,
+            detail="Assignee not found"
+        )
     return assignee
 
 @router.delete("/{assignee_id}", response_model=AssigneeResponse)
@@ -108,11 +123,10 @@ async def delete_assignee(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_roles([Role.ADMIN]))
 ):  
-    assignee = await crud_assignee.get(db=db, id=assignee_id)
+    assignee = await crud_assignee.remove(db=db, id=assignee_id)
     if not assignee:
         raise HTTPException(
             status_code=404,
             detail="Assignee not found"
         )
-    assignee = await crud_assignee.remove(db=db, id=assignee_id)
     return assignee
\ No newline at end of file
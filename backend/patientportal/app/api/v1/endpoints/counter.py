@@ -1,11 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
 from app.schemas.today_counter import ResponeCounter
-from sqlalchemy import select
-from app.models.today_counter import TodayCounter
-from app.models.request import Request
-from app.schemas.request import Status
+from app.core.now_serving import now_serving
+from app.crud import crud_todaycounter
+from app.crud.crud_todaycounter import today
 
 from app.api.deps import get_db
 router = APIRouter()
@@ -13,23 +11,23 @@ router = APIRouter()
 
 @router.get("/last", response_model=ResponeCounter)
 async def get_last(
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
 ):
-    
-    query = (
-        select(TodayCounter)
-        .join(Request, TodayCounter.request_id == Request.id)
-        .filter(Request.status == Status.COMPLETED)
-        .order_by(Request.updated_at.desc())  # Order by updated_at field
-        .limit(1)
-    )
-    result = await db.execute(query)
-    last_record = result.scalars().first()
+    # Served from memory, the database is only read when nothing is loaded for today
+    if not now_serving.is_current(today()):
+        await crud_todaycounter.load_now_serving(db)
 
-    if not last_record:
+    if now_serving.counter_id is None:
         raise HTTPException(status_code=404, detail="No completed request found.")
 
+    # Displays poll this, let them revalidate every time and mostly get a 304
+    headers = {"ETag": now_serving.etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == now_serving.etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
     return ResponeCounter(
-        request_id=last_record.request_id,
-        last_counter=last_record.id,  
-    )
\ No newline at end of file
+        request_id=now_serving.request_id,
+        last_counter=now_serving.counter_id,
+    )
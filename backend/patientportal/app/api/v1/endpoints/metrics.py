@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends
+from app.api.deps import require_roles
+from app.core.roles import Role
+from app.core.principal_cache import principal_cache
+from app.core.password_hasher import password_hasher
+from app.core.token_revocation import token_revocations
+from app.core.result_cache import assignee_stats_cache, timeseries_cache
+from app.core.event_bus import event_bus
+from app.models.user import User
+from .websocket_manager import websocket_manager
+from .websocket_counter_manager import counter_websocket_manager
+
+router = APIRouter()
+
+
+@router.get("/")
+async def read_metrics(
+    current_user: User = Depends(require_roles([Role.ADMIN]))
+):
+    return {
+        "principal_cache": principal_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "token_revocations": token_revocations.stats(),
+        "assignee_stats_cache": assignee_stats_cache.stats(),
+        "timeseries_cache": timeseries_cache.stats(),
+        "websockets": websocket_manager.stats(),
+        "counter_websockets": counter_websocket_manager.stats(),
+        "event_bus": event_bus.stats(),
+    }
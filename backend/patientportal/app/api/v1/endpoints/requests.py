@@ -1,13 +1,20 @@
 from datetime import date, datetime, timezone
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from app.crud import crud_request, crud_todaycounter
+from app.crud import crud_request, crud_request_stats, crud_request_timeseries, crud_request_turnaround, crud_user
+from app.crud.crud_request_timeseries import GRANULARITIES, utc_trunc
+from app.crud.crud_todaycounter import today
+from app.core.now_serving import now_serving
+from app.core.result_cache import timeseries_cache
 from app.models.request import Request
-from app.schemas.request import RequestCreate, RequestUpdate, RequestResponse, RequestListResponse, RequestStats, Status
+from app.schemas.request import RequestBulkCreate, RequestBulkResponse, RequestBulkUpdate, RequestBulkUpdateResponse, RequestCreate, RequestUpdate, RequestResponse, RequestListResponse, RequestStats, RequestTimeseries, RequestTurnaroundStats, Status
 from app.schemas.today_counter import ResponseCounterForRequests
-from app.models.today_counter import TodayCounter
-from sqlalchemy import case, func, select
+from app.schemas.user import UserResponse
+from app.schemas.assignee import AssigneeResponse
+from sqlalchemy.exc import IntegrityError
 from app.api.deps import get_db, get_current_user, get_optional_current_user, require_roles
 from app.models.user import User
 from app.core.roles import Role
@@ -17,6 +24,14 @@ from app.core.config import settings
 
 router = APIRouter()
 
+# Who is told about request changes, resolved against the connected sockets
+NOTIFIED_ROLES = (Role.ADMIN, Role.VERIFIER, Role.INSERTER)
+
+
+async def notify(notification: dict):
+    # Same payload for every role, encoded once however many sockets are connected
+    await websocket_manager.broadcast_to_roles(NOTIFIED_ROLES, notification)
+
 def parse_date_with_timezone(date_str: Optional[str]) -> Optional[datetime]:
     if not date_str:
         return None
@@ -27,11 +42,64 @@ def parse_date_with_timezone(date_str: Optional[str]) -> Optional[datetime]:
     except ValueError:
         return None
 
+def split_csv(value: Optional[str]) -> Optional[List[str]]:
+    if value is None:
+        return None
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+RELATED_RESPONSES = {
+    "creator": UserResponse,
+    "assignee": AssigneeResponse,
+    "counter": ResponseCounterForRequests,
+}
+
+def serialize_sparse_request(request: Request, fields: List[str], include: List[str]) -> dict:
+    # Only the requested columns and relationships, the rest were never loaded
+    data = {name: getattr(request, name) for name in dict.fromkeys(["id", *fields])}
+    for name in include:
+        related = getattr(request, name)
+        data[name] = (
+            RELATED_RESPONSES[name].model_validate(related, from_attributes=True).model_dump()
+            if related is not None else None
+        )
+    return data
+
+def resolve_loading(fields: Optional[str], include: Optional[str]) -> tuple:
+    # A sparse fieldset without include= means no relationships at all
+    field_list = split_csv(fields)
+    include_list = split_csv(include)
+    if field_list is not None and include_list is None:
+        include_list = []
+    return field_list, include_list
+
 def get_date_range(date_val: datetime) -> tuple[datetime, datetime]:
     day_start = datetime.combine(date_val.date(), datetime.min.time()).replace(tzinfo=timezone.utc)
     day_end = datetime.combine(date_val.date(), datetime.max.time()).replace(tzinfo=timezone.utc)
     return day_start, day_end
 
+def build_request_filters(
+    status: Optional[Status], start_date: Optional[str], end_date: Optional[str]
+) -> dict:
+    filters = {}
+    if status:
+        filters['status'] = status
+    if start_date:
+        start_datetime = parse_date_with_timezone(start_date)
+        if start_datetime:
+            filters['start_date'] = start_datetime
+    if end_date:
+        end_datetime = parse_date_with_timezone(end_date)
+        if end_datetime:
+            # Set to end of day for inclusive filtering
+            _, day_end = get_date_range(end_datetime)
+            filters['end_date'] = day_end
+    return filters
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
 
 @router.get("/stats", response_model=RequestStats)
 async def get_request_stats(
@@ -42,54 +110,81 @@ async def get_request_stats(
     
     parsed_date = parse_date_with_timezone(today_date) or datetime.now(timezone.utc)
 
-    day_start, day_end = get_date_range(parsed_date)
-    year_start = datetime(parsed_date.year, 1, 1, tzinfo=timezone.utc)
-
-    counts = await db.execute(
-        select(
-            func.count(Request.id).label("total"),
-            func.sum(
-                case((Request.status == Status.COMPLETED, 1), else_=0)
-            ).label("completed"),
-            func.sum(
-                case((Request.status == Status.PENDING, 1), else_=0)
-            ).label("pending"),
-            func.sum(
-                case((Request.created_at.between(day_start, day_end), 1), else_=0)
-            ).label("today")
-        ).filter(Request.created_at >= year_start)
+    # Answered from the per-day rollups, at most one row per day of the year
+    counts = await crud_request_stats.summary(
+        db, day=parsed_date.date(), year_start=date(parsed_date.year, 1, 1)
     )
+    return RequestStats(**counts)
+
+
+@router.get("/stats/timeseries", response_model=RequestTimeseries)
+async def get_request_timeseries(
+    response: Response,
+    granularity: str = "hour",
+    start: str = None,
+    end: str = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_roles([Role.ADMIN, Role.VERIFIER]))
+):
+    if granularity not in GRANULARITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Granularity must be one of: {', '.join(GRANULARITIES)}"
+        )
+    step = GRANULARITIES[granularity]
+    now = datetime.now(timezone.utc)
+    end_at = parse_date_with_timezone(end) or now
+    start_at = parse_date_with_timezone(start) or end_at - step * 24
+    if start_at >= end_at:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if (end_at - utc_trunc(granularity, start_at)) / step > settings.TIMESERIES_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Can't return more than {settings.TIMESERIES_MAX_BUCKETS} buckets at a time"
+        )
 
-    result = counts.first()
-    return RequestStats(
-        total=result.total or 0,
-        completed=result.completed or 0,
-        pending=result.pending or 0,
-        today=result.today or 0
+    # Hours before the current one are final, so a range that ends there never changes
+    final = end_at <= utc_trunc("hour", now)
+    key = (granularity, start_at, end_at)
+    series = timeseries_cache.get(key) if final else None
+    if series is None:
+        series = await crud_request_timeseries.series(
+            db, granularity=granularity, start=start_at, end=end_at
+        )
+        if final:
+            timeseries_cache.set(key, series, timeseries_cache.generation)
+    response.headers["Cache-Control"] = (
+        "private, max-age=31536000, immutable" if final else "private, no-cache"
     )
+    return {"granularity": granularity, "results": series}
 
+@router.get("/stats/turnaround", response_model=RequestTurnaroundStats)
+async def get_request_turnaround(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_roles([Role.ADMIN, Role.VERIFIER]))
+):
+    # Estimates within 1%, from per-day sketches: the cost doesn't grow with the requests
+    return await crud_request_turnaround.summary(db, today=datetime.now(timezone.utc).date())
 
 async def get_request_creator(
     request: RequestCreate,
     db: AsyncSession,
     current_user: Optional[User]
-) -> int:
+) -> User:
     if request.is_guest:
-        query = select(User).filter(User.is_guest == True)
-        result = await db.execute(query)
-        guest_user = result.scalar_one_or_none()
+        guest_user = await crud_user.get_guest(db)
         if not guest_user:
             raise HTTPException(
                 status_code=500,
                 detail="Guest user not properly initialized"
             )
-        return guest_user.id
+        return guest_user
     if not current_user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Authentication required for non-guest requests"
         )
-    return current_user.id
+    return current_user
 
 @router.post("/", response_model=RequestResponse)
 async def create_request(
@@ -101,38 +196,72 @@ async def create_request(
     if current_user is None or current_user.role not in [Role.ADMIN, Role.VERIFIER]:
         request.notes = None
 
-    created_by = await get_request_creator(request, db, current_user)
-    new_request = await crud_request.create(db, obj_in=request, created_by=created_by)
-    
-    # This is to update the daily counter 
-    # create model object for the daily counter
+    # Round-trip budget, one transaction and one commit:
+    #   BEGIN
+    #   INSERT request + TodayCounter ... RETURNING (one statement, see create_with_counter)
+    #   COMMIT
+    # The caller and the guest user come from in-process caches, the users to notify
+    # from the websocket registry, nothing is refreshed
+    creator = await get_request_creator(request, db, current_user)
 
-    daily_counter = TodayCounter(request_id=new_request.id)
+    new_request = await crud_request.create_with_counter(db, obj_in=request, created_by=creator.id)
 
-    daily_counter = await crud_todaycounter.create(db, obj_in=daily_counter)
-    
-    # Get all users with ADMIN or VERIFIER roles to notify them
-    query = select(User.id).filter(User.role.in_([Role.ADMIN, Role.VERIFIER, Role.INSERTER]))
-    result = await db.execute(query)
-    user_ids = [row[0] for row in result.all()]
-    
     notification = {
         "type": "new_request",
         "data": {
-            "id": new_request.id,
-            "full_name": new_request.full_name,
-            "medical_number": new_request.medical_number,
-            "national_id": new_request.national_id,
-            "status": new_request.status,
-            "notes": new_request.notes,
-            "created_at": new_request.created_at.astimezone(timezone.utc).isoformat(),
-            "counter": ResponseCounterForRequests(id=daily_counter.id).model_dump(),
+            "id": new_request["id"],
+            "full_name": new_request["full_name"],
+            "medical_number": new_request["medical_number"],
+            "national_id": new_request["national_id"],
+            "status": new_request["status"],
+            "notes": new_request["notes"],
+            "created_at": new_request["created_at"].astimezone(timezone.utc).isoformat(),
+            "counter": new_request["counter"],
         }
     }
-    await websocket_manager.broadcast_to_users(user_ids, notification)
-    # We override the counter as it's not updated on the server as we added the counter after the request created 
-    # So, we simply override it,  we don't have to fetch another query to get the updated request !
-    return { **new_request.__dict__, "counter": ResponseCounterForRequests(id=daily_counter.id)}
+    await notify(notification)
+    return {**new_request, "creator": creator, "assignee": None}
+
+@router.post("/bulk", response_model=RequestBulkResponse)
+async def create_requests_bulk(
+    bulk: RequestBulkCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_roles([Role.ADMIN, Role.VERIFIER, Role.INSERTER]))
+):
+    if not bulk.requests:
+        raise HTTPException(status_code=400, detail="No requests to create")
+    if len(bulk.requests) > settings.MAX_BULK_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Can't create more than {settings.MAX_BULK_SIZE} requests at a time"
+        )
+    # Same rule as create_request, notes are only kept for admin and verifier
+    if current_user.role not in [Role.ADMIN, Role.VERIFIER]:
+        for request in bulk.requests:
+            request.notes = None
+
+    created = await crud_request.create_many(db, objs_in=bulk.requests, created_by=current_user.id)
+
+    # One new_request event per request, the same the clients get from create_request
+    for request in created:
+        await notify({
+            "type": "new_request",
+            "data": {
+                "id": request["id"],
+                "full_name": request["full_name"],
+                "medical_number": request["medical_number"],
+                "national_id": request["national_id"],
+                "status": request["status"],
+                "notes": request["notes"],
+                "created_at": request["created_at"].astimezone(timezone.utc).isoformat(),
+                "counter": request["counter"],
+            }
+        })
+
+    # Claims-only principals (AUTH_STATELESS_ROLES) carry no username
+    creator = current_user if isinstance(current_user, User) else await crud_user.get(db, current_user.id)
+    creator = UserResponse.model_validate(creator, from_attributes=True)
+    return {"results": [{**request, "creator": creator, "assignee": None} for request in created]}
 
 @router.delete("/{request_id}", response_model=RequestResponse)
 async def delete_request(
@@ -140,30 +269,26 @@ async def delete_request(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_roles([Role.ADMIN]))
 ):
-    request = await crud_request.get(db, id=request_id)
-    if not request:
-        raise HTTPException(status_code=404, detail="Request not found")
     deleted_request = await crud_request.remove(db, id=request_id)
-    
-    query = select(User.id).filter(User.role.in_([Role.ADMIN, Role.VERIFIER, Role.INSERTER]))
-    result = await db.execute(query)
-    user_ids = [row[0] for row in result.all()]
-    
+    if not deleted_request:
+        raise HTTPException(status_code=404, detail="Request not found")
+    await now_serving.announce_deleted(request_id)
+
     notification = {
         "type": "deleted_request",
         "data": {
-            "id": deleted_request.id,
-            "full_name": deleted_request.full_name,
-            "medical_number": deleted_request.medical_number,
-            "national_id": deleted_request.national_id,
-            "status": deleted_request.status,
-            "created_at": deleted_request.created_at.astimezone(timezone.utc).isoformat(),
+            "id": deleted_request["id"],
+            "full_name": deleted_request["full_name"],
+            "medical_number": deleted_request["medical_number"],
+            "national_id": deleted_request["national_id"],
+            "status": deleted_request["status"],
+            "created_at": deleted_request["created_at"].astimezone(timezone.utc).isoformat(),
             "deleted_by": current_user.id,
-            "counter": ResponseCounterForRequests(id=deleted_request.counter.id).model_dump() if deleted_request.counter and deleted_request.counter.id is not None else None
+            "counter": deleted_request["counter"]
         }
     }
     
-    await websocket_manager.broadcast_to_users(user_ids, notification)
+    await notify(notification)
     return deleted_request
 
 @router.get("/", response_model=RequestListResponse)
@@ -174,6 +299,11 @@ async def read_requests(
     start_date: str = None,
     end_date: str = None,
     order_by: Optional[str] = "-updated_at, -created_at",
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    estimate_total: bool = False,
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_roles([Role.ADMIN, Role.VERIFIER, Role.INSERTER]))
 ):
@@ -188,41 +318,176 @@ async def read_requests(
                 status_code=400,
                 detail=f"Limit must be less than or equal to {settings.MAX_FETCH_LIMIT}"
             )
-        filters = {}
-        if status:
-            filters['status'] = status
-        if start_date:
-            start_datetime = parse_date_with_timezone(start_date)
-            if start_datetime:
-                filters['start_date'] = start_datetime
-        if end_date:
-            end_datetime = parse_date_with_timezone(end_date)
-            if end_datetime:
-                # Set to end of day for inclusive filtering
-                _, day_end = get_date_range(end_datetime)
-                filters['end_date'] = day_end
-            
+        filters = build_request_filters(status, start_date, end_date)
+        field_list, include_list = resolve_loading(fields, include)
+        if field_list is None:
+            # Full rows are encoded straight from SQL, same JSON as RequestListResponse
+            content = await crud_request.get_multi_json(
+                db,
+                skip=skip,
+                limit=limit,
+                filters=filters,
+                order_by=order_by,
+                cursor=cursor,
+                include_total=include_total,
+                estimate_total=estimate_total,
+                include=include_list,
+            )
+            return Response(content=content, media_type="application/json")
+
         requests = await crud_request.get_multi(
-            db, skip=skip, limit=limit, filters=filters, order_by=order_by
+            db,
+            skip=skip,
+            limit=limit,
+            filters=filters,
+            order_by=order_by,
+            cursor=cursor,
+            include_total=include_total,
+            estimate_total=estimate_total,
+            include=include_list,
+            fields=field_list,
         )
-        return requests
+        requests["results"] = [
+            serialize_sparse_request(request, field_list, include_list)
+            for request in requests["results"]
+        ]
+        return JSONResponse(content=jsonable_encoder(requests))
         
     except HTTPException as http_exc:
         raise http_exc
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/export")
+async def export_requests(
+    status: Status = None,
+    start_date: str = None,
+    end_date: str = None,
+    format: str = "ndjson",
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_roles([Role.ADMIN, Role.VERIFIER]))
+):
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Format must be one of: {', '.join(EXPORT_MEDIA_TYPES)}"
+        )
+    filters = build_request_filters(status, start_date, end_date)
+    # Same row layout as the list endpoint, oldest first
+    encoder = crud_request.build_list_encoder()
+
+    async def body():
+        header = True
+        async for rows in crud_request.stream(db, encoder=encoder, filters=filters, order_by="created_at"):
+            if format == "csv":
+                yield encoder.encode_csv(rows, header=header)
+                header = False
+            else:
+                yield encoder.encode_ndjson(rows)
+        if format == "csv" and header:
+            # No rows, still send the header
+            yield encoder.encode_csv([], header=True)
+
+    filename = f"requests.{format}"
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 @router.get("/{request_id}", response_model=RequestResponse)
 async def read_request(
     request_id: int,
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_roles([Role.ADMIN, Role.VERIFIER]))
 ):
-    request = await crud_request.get(db, id=request_id)
+    field_list, include_list = resolve_loading(fields, include)
+    try:
+        request = await crud_request.get(db, id=request_id, include=include_list, fields=field_list)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not request:
         raise HTTPException(status_code=404, detail="Request not found")
+    if field_list is not None:
+        return JSONResponse(content=jsonable_encoder(
+            serialize_sparse_request(request, field_list, include_list)
+        ))
+    if include_list is not None:
+        # Relationships left out were never loaded (raiseload), render them as null
+        data = {name: getattr(request, name) for name in Request.__table__.columns.keys()}
+        data.update({name: getattr(request, name) if name in include_list else None
+                     for name in crud_request.RELATIONSHIPS})
+        return RequestResponse.model_validate(data, from_attributes=True)
     return request
 
+@router.put("/bulk", response_model=RequestBulkUpdateResponse)
+async def update_requests_bulk(
+    bulk: RequestBulkUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_roles([Role.ADMIN, Role.VERIFIER]))
+):
+    ids = list(dict.fromkeys(bulk.ids))
+    if not ids:
+        raise HTTPException(status_code=400, detail="No requests to update")
+    if len(ids) > settings.MAX_BULK_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Can't update more than {settings.MAX_BULK_SIZE} requests at a time"
+        )
+    try:
+        # Same rule as update_request: only admin can edit completed requests
+        updated = await crud_request.update_many(
+            db, ids=ids, obj_in=bulk, include_completed=current_user.role == Role.ADMIN
+        )
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="Assignee not found")
+
+    # RETURNING order isn't guaranteed, answer in the order the ids were given
+    position = {request_id: i for i, request_id in enumerate(ids)}
+    updated.sort(key=lambda request: position[request["id"]])
+    updated_ids = {request["id"] for request in updated}
+    skipped = [request_id for request_id in ids if request_id not in updated_ids]
+    if not updated:
+        return {"results": [], "skipped": skipped}
+
+    # One updated_request event per request, the same the clients get from update_request
+    for request in updated:
+        await notify({
+            "type": "updated_request",
+            "data": {
+                "id": request["id"],
+                "full_name": request["full_name"],
+                "status": request["status"],
+                "updated_at": request["updated_at"].astimezone(timezone.utc).isoformat() if request["updated_at"] else None,
+                "medical_number": request["medical_number"],
+                "notes": request["notes"],
+                "assigned_to": request["assigned_to"],
+                "created_at": request["created_at"].astimezone(timezone.utc).isoformat(),
+                "updated_by": current_user.id,
+                "counter": request["counter"],
+            }
+        })
+
+    # The display only shows the latest number, so the batch is coalesced into one update.
+    # Numbers restart every day, only today's tickets count; they were all completed by
+    # the same statement, so the last one given is the last one completed
+    day = today()
+    completed = [request for request in updated if request["counter"] and request["counter_day"] == day]
+    if completed:
+        last_counter, last_request_id = completed[-1]["counter"]["id"], completed[-1]["id"]
+        await now_serving.announce(last_request_id, last_counter, day=day)
+        await counter_websocket_manager.broadcast({
+            "type": "counter_update",
+            "last_counter": last_counter
+        })
+
+    return {"results": updated, "skipped": skipped}
+
 @router.put("/{request_id}", response_model=RequestResponse)
 async def update_request(
     request_id: int,
@@ -237,12 +502,14 @@ async def update_request(
         if request.status == Status.COMPLETED and current_user.role != Role.ADMIN:
             raise HTTPException(status_code=403, detail="Only admin can edit completed requests")
             
-        request.status = Status.COMPLETED
-        updated_request = await crud_request.update(db, db_obj=request, obj_in=request_in)
-        
-        query = select(User.id).filter(User.role.in_([Role.ADMIN, Role.VERIFIER, Role.INSERTER]))
-        result = await db.execute(query)
-        user_ids = [row[0] for row in result.all()]
+        updated_request = await crud_request.update(
+            db,
+            db_obj=request,
+            obj_in={**request_in.model_dump(exclude_unset=True), "status": Status.COMPLETED},
+            fast=True,
+        )
+        if not updated_request:
+            raise HTTPException(status_code=404, detail="Request not found")
 
         notification = {
             "type": "updated_request",
@@ -260,9 +527,11 @@ async def update_request(
             }
         }
         # Send the last updated users to the active ws
-        await websocket_manager.broadcast_to_users(user_ids, notification)
-        # Send it to the counter webscoket 
-        if updated_request.counter and updated_request.counter.id is not None:
+        await notify(notification)
+        # Send it to the counter webscoket, only today's tickets are on display
+        day = today()
+        if updated_request.counter and updated_request.counter.id is not None and updated_request.counter.day == day:
+            await now_serving.announce(updated_request.id, updated_request.counter.id, day=day)
             message = {
                     "type": "counter_update",
                     "last_counter": updated_request.counter.id
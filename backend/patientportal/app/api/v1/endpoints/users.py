@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 from app.crud import crud_user
 from app.schemas.user import UserCreate, UserResponse, UserListResponse
 from app.api.deps import get_db, get_current_user, require_roles
@@ -30,6 +30,9 @@ async def read_user_me(
 async def read_users(
     skip: int = 0,
     limit: int = settings.MAX_FETCH_LIMIT,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    estimate_total: bool = False,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_roles([Role.ADMIN]))
 ):
@@ -38,7 +41,19 @@ async def read_users(
             status_code=400,
             detail=f"Limit must be less than or equal to {settings.MAX_FETCH_LIMIT}"
         )
-    return await crud_user.get_multi(db, skip=skip, limit=limit)
+    try:
+        # Encoded straight from the rows, same JSON as the response model
+        content = await crud_user.get_multi_json(
+            db,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            include_total=include_total,
+            estimate_total=estimate_total,
+        )
+        return Response(content=content, media_type="application/json")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{user_id}", response_model=UserResponse)
 async def delete_user(
@@ -46,11 +61,13 @@ async def delete_user(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_roles([Role.ADMIN]))
 ):
-    user = await crud_user.get(db, id=user_id)
+    if user_id == current_user.id:
+        raise HTTPException(status_code=400, detail="Can't delete yourself!")
+    user = await crud_user.remove(db, id=user_id)
     if not user:
+        # Nothing was deleted, only now look at why
+        user = await crud_user.get(db, id=user_id)
+        if user and user.is_guest:
+            raise HTTPException(status_code=400, detail="Can't delete guest user!")
         raise HTTPException(status_code=404, detail="User not found")
-    if user.id == current_user.id:
-        raise HTTPException(status_code=400, detail="Can't delete yourself!")
-    if user.is_guest:
-        raise HTTPException(status_code=400, detail="Can't delete guest user!")
-    return await crud_user.remove(db, id=user_id)
\ No newline at end of file
+    return user
\ No newline at end of file
@@ -13,7 +13,7 @@ async def websocket_endpoint(
     current_user: User = Depends(get_current_user_ws)
 ):
     try:
-        await websocket_manager.connect(websocket, current_user.id)
+        await websocket_manager.connect(websocket, current_user.id, current_user.role)
         # await websocket.send_text("Connection established")
         try:
             while True:
@@ -1,28 +1,49 @@
-from typing import List
+from typing import Any, Dict, List
 from fastapi import WebSocket
+from app.core.config import settings
+from app.core.event_bus import event_bus
+from .websocket_sender import ConnectionSender, SendStats, encode_message
 
 class CounterWebSocketManager:
     def __init__(self):
         self.active_connections: List[WebSocket] = []
+        self.senders: Dict[WebSocket, ConnectionSender] = {}
+        self.send_stats = SendStats()
+        event_bus.subscribe("ws.counter", self._deliver)
     
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
+        self.senders[websocket] = ConnectionSender(
+            websocket,
+            max_size=settings.WS_SEND_QUEUE_SIZE,
+            policy=settings.WS_SLOW_CONSUMER_POLICY,
+            stats=self.send_stats,
+            on_close=self._remove,
+        )
         self.active_connections.append(websocket)
     
     async def disconnect(self, websocket: WebSocket):
+        sender = self.senders.get(websocket)
+        if sender is not None:
+            sender.close()
+        self._remove(websocket)
+
+    def _remove(self, websocket: WebSocket):
+        self.senders.pop(websocket, None)
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
     
     async def broadcast(self, message: dict):
+        # Every process sends it to the displays it holds
+        await event_bus.publish("ws.counter", message)
+
+    async def _deliver(self, message: dict):
+        # Encoded once, then only enqueued: each socket's writer task does the sending
+        frame = encode_message(message)
+        for connection in list(self.active_connections):
+            self.senders[connection].send(frame)
 
-        disconnected_websockets = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except:
-                disconnected_websockets.append(connection)
-        
-        for websocket in disconnected_websockets:
-            await self.disconnect(websocket)
+    def stats(self) -> Dict[str, Any]:
+        return self.send_stats.report(self.senders.values())
 
-counter_websocket_manager = CounterWebSocketManager()
\ No newline at end of file
+counter_websocket_manager = CounterWebSocketManager()
@@ -1,31 +1,96 @@
-from typing import Dict, List
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Set
 from fastapi import WebSocket
 from datetime import datetime
+from app.core.config import settings
+from app.core.event_bus import event_bus
+from .websocket_sender import ConnectionSender, SendStats, encode_message
 
 class WebSocketManager:
     def __init__(self):
         self.active_connections: Dict[int, List[WebSocket]] = {}
+        self.senders: Dict[WebSocket, ConnectionSender] = {}
+        self.send_stats = SendStats()
+        # Connected users by role, so role broadcasts never read the users table
+        self.users_by_role: Dict[str, Set[int]] = defaultdict(set)
+        self._roles: Dict[int, str] = {}
+        self._users: Dict[WebSocket, int] = {}
+        event_bus.subscribe("ws.roles", self._deliver_to_roles)
+        event_bus.subscribe("users.role_changed", self._on_role_changed)
+        event_bus.subscribe("users.deleted", self._on_deleted)
         
-    async def connect(self, websocket: WebSocket, user_id: int):
+    async def connect(self, websocket: WebSocket, user_id: int, role: str):
         await websocket.accept()
+        self.senders[websocket] = ConnectionSender(
+            websocket,
+            max_size=settings.WS_SEND_QUEUE_SIZE,
+            policy=settings.WS_SLOW_CONSUMER_POLICY,
+            stats=self.send_stats,
+            on_close=self._remove,
+        )
+        self._users[websocket] = user_id
         if user_id not in self.active_connections:
             self.active_connections[user_id] = []
         self.active_connections[user_id].append(websocket)
+        # The latest connection's token has the current role
+        self._drop_role(user_id)
+        self._roles[user_id] = role
+        self.users_by_role[role].add(user_id)
     
     async def disconnect(self, websocket: WebSocket, user_id: int):
+        sender = self.senders.get(websocket)
+        if sender is not None:
+            sender.close()
+        self._remove(websocket)
+
+    def _remove(self, websocket: WebSocket):
+        self.senders.pop(websocket, None)
+        user_id = self._users.pop(websocket, None)
         if user_id in self.active_connections:
-            self.active_connections[user_id].remove(websocket)
+            if websocket in self.active_connections[user_id]:
+                self.active_connections[user_id].remove(websocket)
             if not self.active_connections[user_id]:
                 del self.active_connections[user_id]
+                self._drop_role(user_id)
+
+    def forget_user(self, user_id: int):
+        # A deleted user's open sockets get no more role broadcasts
+        self._drop_role(user_id)
+
+    async def _on_deleted(self, event: Dict[str, Any]):
+        self.forget_user(event["user_id"])
+
+    async def _on_role_changed(self, event: Dict[str, Any]):
+        # Open sockets follow the user's new role, e.g. a demoted verifier stops getting notes
+        user_id = event["user_id"]
+        if user_id in self._roles:
+            self._drop_role(user_id)
+            self._roles[user_id] = event["role"]
+            self.users_by_role[event["role"]].add(user_id)
+
+    def _drop_role(self, user_id: int):
+        role = self._roles.pop(user_id, None)
+        if role is not None:
+            self.users_by_role[role].discard(user_id)
     
-    async def broadcast_to_users(self, user_ids: List[int], message: dict):
-        for user_id in user_ids:
-            if user_id in self.active_connections:
-                for connection in self.active_connections[user_id]:
-                    try:
-                        await connection.send_json(message)
-                    except:
-                        # Handle disconnected clients
-                        await self.disconnect(connection, user_id)
-
-websocket_manager = WebSocketManager()
\ No newline at end of file
+    async def broadcast_to_roles(self, roles: Iterable[str], message: Any):
+        # Goes through the event bus, every process sends it to the sockets it holds
+        await event_bus.publish("ws.roles", {"roles": list(roles), "message": message})
+
+    async def _deliver_to_roles(self, event: Dict[str, Any]):
+        # Costs one pass over the connected users of these roles, not over all users.
+        # Encoded once, whatever the number of sockets
+        frame = encode_message(event["message"])
+        for role in event["roles"]:
+            self._send(self.users_by_role.get(role, ()), frame)
+
+    def _send(self, user_ids: Iterable[int], frame: str):
+        # Only enqueues, each socket's writer task does the sending
+        for user_id in list(user_ids):
+            for connection in list(self.active_connections.get(user_id, ())):
+                self.senders[connection].send(frame)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.send_stats.report(self.senders.values())
+
+websocket_manager = WebSocketManager()
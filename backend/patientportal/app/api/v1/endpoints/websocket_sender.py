@@ -0,0 +1,98 @@
+import asyncio
+import json
+from typing import Any, Callable, Dict, Iterable
+from fastapi import WebSocket
+
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "disconnect")
+
+
+def encode_message(message: Any) -> str:
+    # The text frame WebSocket.send_json would send, built once per broadcast
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class SendStats:
+    # Counters shared by the senders of one manager, reported by /metrics
+    def __init__(self):
+        self.sent = 0
+        self.dropped = 0
+        self.slow_disconnects = 0
+        self.max_queue_depth = 0
+
+    def report(self, senders: Iterable["ConnectionSender"]) -> Dict[str, Any]:
+        depths = [sender.queue.qsize() for sender in senders]
+        return {
+            "connections": len(depths),
+            "queued": sum(depths),
+            "deepest_queue": max(depths, default=0),
+            "max_queue_depth": self.max_queue_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "slow_disconnects": self.slow_disconnects,
+        }
+
+
+class ConnectionSender:
+    # A socket's bounded outbound queue of encoded frames and the task writing it
+    # out. Broadcasting only enqueues, so a slow or dead client never stalls the request handler.
+    # When the queue is full, "drop_oldest" discards the oldest queued message and
+    # "disconnect" closes the socket (the client reconnects and reloads)
+    def __init__(
+        self,
+        websocket: WebSocket,
+        *,
+        max_size: int,
+        policy: str,
+        stats: SendStats,
+        on_close: Callable[[WebSocket], None],
+    ):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy '{policy}'")
+        self.websocket = websocket
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=max_size)
+        self.policy = policy
+        self.stats = stats
+        self.on_close = on_close
+        self.closed = False
+        self._writer = asyncio.create_task(self._write())
+
+    def send(self, frame: str) -> None:
+        if self.closed:
+            return
+        if self.queue.full():
+            if self.policy == "disconnect":
+                self.stats.slow_disconnects += 1
+                self.close(code=1013)
+                return
+            self.queue.get_nowait()
+            self.stats.dropped += 1
+        self.queue.put_nowait(frame)
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, self.queue.qsize())
+
+    async def _write(self) -> None:
+        try:
+            while True:
+                frame = await self.queue.get()
+                await self.websocket.send_text(frame)
+                self.stats.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Handle disconnected clients
+            self.close()
+
+    def close(self, code: int = None) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.on_close(self.websocket)
+        if self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        if code is not None:
+            asyncio.create_task(self._close_socket(code))
+
+    async def _close_socket(self, code: int) -> None:
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import users, requests, auth, assignees, websocket, counter
+from app.api.v1.endpoints import users, requests, auth, assignees, websocket, counter, metrics
 
 api_router = APIRouter()
 
@@ -8,4 +8,5 @@ api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(requests.router, prefix="/requests", tags=["requests"])
 api_router.include_router(assignees.router, prefix="/assignees", tags=["assignees"])
 api_router.include_router(counter.router,prefix="/counter", tags=["counter"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
 api_router.include_router(websocket.router, tags=["websocket"])
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional, Dict, Any, List, ClassVar
+from typing import Optional, Dict, Any, List, ClassVar, Literal
 from functools import lru_cache
 from pydantic import ConfigDict, PostgresDsn, Field
 
@@ -34,10 +34,47 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "SECRET_KEY"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Authorize require_roles from verified JWT claims instead of loading the user
+    AUTH_STATELESS_ROLES: bool = False
     
     # Password hashing
     BCRYPT_ROUNDS: int = 12
+    # Hashing runs off the event loop on a "thread" or "process" pool
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: int = 2
+    # Hashing calls beyond this many in flight are rejected with 503
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    # Authenticated user cache (set TTL to 0 to disable)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 1024
     
+    # Assignee leaderboard cache (0 disables it)
+    ASSIGNEE_STATS_CACHE_TTL_SECONDS: int = 30
+
+    # Most buckets one timeseries call may return, per granularity
+    TIMESERIES_MAX_BUCKETS: int = 24 * 31
+
+    # How often completions sketched in memory are written out for the turnaround quantiles
+    TURNAROUND_FLUSH_SECONDS: float = 10
+
+    # Ticket numbers start over at 1 every day in this timezone
+    COUNTER_TIMEZONE: str = "UTC"
+    # Days of tickets kept, older ones are pruned hourly (the requests stay)
+    COUNTER_RETENTION_DAYS: int = 30
+
+    # Messages queued per websocket before the slow consumer policy kicks in:
+    # "drop_oldest" discards the oldest queued message, "disconnect" closes the socket
+    WS_SEND_QUEUE_SIZE: int = 256
+    WS_SLOW_CONSUMER_POLICY: Literal["drop_oldest", "disconnect"] = "drop_oldest"
+
+    # How websocket broadcasts reach the other workers: "inprocess" (single process),
+    # "postgres" (LISTEN/NOTIFY on EVENT_BUS_CHANNEL) or "unix" (a broker on
+    # EVENT_BUS_UNIX_PATH, see app.core.event_bus)
+    EVENT_BUS: str = "inprocess"
+    EVENT_BUS_CHANNEL: str = "patientportal_events"
+    EVENT_BUS_UNIX_PATH: str = "/tmp/patientportal-events.sock"
+
     # Pagination
     DEFAULT_PAGE_SIZE: int = 20
     MAX_PAGE_SIZE: int = 100
@@ -53,6 +90,12 @@ class Settings(BaseSettings):
     # Limit of fetching data
     MAX_FETCH_LIMIT: int = 100
 
+    # Most requests accepted by one bulk call
+    MAX_BULK_SIZE: int = 1000
+
+    # Rows fetched per server-side cursor round trip by the export endpoint
+    EXPORT_BATCH_SIZE: int = 1000
+
     def build_database_url(self) -> None:
         if not self.DATABASE_URL:
             self.DATABASE_URL = PostgresDsn.build(
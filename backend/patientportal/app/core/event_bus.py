@@ -0,0 +1,292 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import uuid
+import asyncpg
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from sqlalchemy.engine import make_url
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Any], Awaitable[None]]
+
+# Longest line a Unix socket client may send (bulk events are large)
+LINE_LIMIT = 2 ** 24
+
+
+class EventBus:
+    # Delivers events to the subscribed handlers of every process. publish() runs
+    # this process's handlers right away, then the backend forwards the event to the
+    # other processes, which run theirs when it arrives (their own echo is skipped).
+    # This base class is the in-process backend: nothing is forwarded
+    backend = "inprocess"
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self.published = 0
+        self.forwarded = 0
+        self.received = 0
+        self.errors = 0
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        self._handlers[topic].append(handler)
+
+    async def publish(self, topic: str, payload: Any) -> None:
+        self.published += 1
+        await self._dispatch(topic, payload)
+        try:
+            if await self._forward(topic, payload):
+                self.forwarded += 1
+        except Exception:
+            # This process was served, the others miss the event
+            self.errors += 1
+            logger.exception("Forwarding a %s event failed", topic)
+
+    async def _dispatch(self, topic: str, payload: Any) -> None:
+        for handler in self._handlers.get(topic, ()):
+            await handler(payload)
+
+    def _encode(self, topic: str, payload: Any) -> str:
+        return json.dumps({"o": self.origin, "t": topic, "p": payload}, separators=(",", ":"), ensure_ascii=False)
+
+    async def _receive(self, text: str) -> None:
+        event = json.loads(text)
+        if event["o"] == self.origin:
+            return
+        self.received += 1
+        try:
+            await self._dispatch(event["t"], event["p"])
+        except Exception:
+            self.errors += 1
+            logger.exception("Handling a %s event failed", event["t"])
+
+    async def _forward(self, topic: str, payload: Any) -> bool:
+        return False
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "published": self.published,
+            "forwarded": self.forwarded,
+            "received": self.received,
+            "errors": self.errors,
+        }
+
+
+class PostgresEventBus(EventBus):
+    # LISTEN/NOTIFY on one channel, for several workers or machines sharing the
+    # database. A NOTIFY payload must stay under 8000 bytes, so events are sent as
+    # numbered chunks (in one transaction, delivered in order) and put back together.
+    # publish() only queues the NOTIFY, a background task sends them one at a time
+    backend = "postgres"
+    CHUNK_SIZE = 1900  # characters, at most 4 bytes each in UTF-8
+    OUTBOX_SIZE = 10000  # events waiting to be sent, past that they are dropped
+
+    def __init__(self, connect_args: Dict[str, Any], channel: str):
+        super().__init__()
+        self.connect_args = connect_args
+        self.channel = channel
+        self._listener = None
+        self._publisher = None
+        self._outbox: asyncio.Queue = asyncio.Queue(self.OUTBOX_SIZE)
+        self._sender: Optional[asyncio.Task] = None
+        self._message_ids = itertools.count()
+        self._partial: Dict[str, List[str]] = {}
+        self._stopping = False
+
+    async def start(self) -> None:
+        self._stopping = False
+        await self._listen()
+        self._publisher = await asyncpg.connect(**self.connect_args)
+        self._sender = asyncio.create_task(self._send_outbox())
+
+    async def _listen(self) -> None:
+        self._listener = await asyncpg.connect(**self.connect_args)
+        self._listener.add_termination_listener(self._on_listener_lost)
+        await self._listener.add_listener(self.channel, self._on_notify)
+
+    def _on_listener_lost(self, connection) -> None:
+        if not self._stopping:
+            asyncio.get_running_loop().create_task(self._relisten())
+
+    async def _relisten(self) -> None:
+        # Events sent while disconnected are lost, like with any LISTEN
+        self._partial.clear()
+        while not self._stopping:
+            try:
+                await self._listen()
+                return
+            except (OSError, asyncpg.PostgresError):
+                self.errors += 1
+                await asyncio.sleep(1)
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._sender is not None:
+            # What was published before shutting down still goes out
+            try:
+                await asyncio.wait_for(self._outbox.join(), timeout=5)
+            except asyncio.TimeoutError:
+                logger.warning("Stopping with %d events unsent", self._outbox.qsize())
+            self._sender.cancel()
+            self._sender = None
+        for connection in (self._listener, self._publisher):
+            if connection is not None:
+                await connection.close()
+        self._listener = self._publisher = None
+
+    async def _forward(self, topic: str, payload: Any) -> bool:
+        text = self._encode(topic, payload)
+        pieces = [text[i:i + self.CHUNK_SIZE] for i in range(0, len(text), self.CHUNK_SIZE)]
+        message_id = f"{self.origin}.{next(self._message_ids)}"
+        # Raises QueueFull when the database can't keep up, counted as an error
+        self._outbox.put_nowait(
+            [(self.channel, f"{message_id}:{i}:{len(pieces)}:{piece}") for i, piece in enumerate(pieces)]
+        )
+        return True
+
+    async def _send_outbox(self) -> None:
+        while True:
+            chunks = await self._outbox.get()
+            try:
+                if self._publisher is None or self._publisher.is_closed():
+                    self._publisher = await asyncpg.connect(**self.connect_args)
+                # Atomic, so all chunks are committed (and delivered) together
+                await self._publisher.executemany("SELECT pg_notify($1, $2)", chunks)
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                # This event is lost for the other processes, the next one reconnects
+                self.errors += 1
+                logger.exception("Sending an event failed")
+            finally:
+                self._outbox.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "outbox": self._outbox.qsize()}
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str) -> None:
+        message_id, index, count, piece = payload.split(":", 3)
+        if message_id.startswith(self.origin + "."):
+            return
+        parts = self._partial.setdefault(message_id, [])
+        parts.append(piece)
+        if len(parts) == int(count):
+            del self._partial[message_id]
+            asyncio.get_running_loop().create_task(self._receive("".join(parts)))
+
+
+class UnixSocketBroker:
+    # Relays every line a client writes to all connected clients. Enough to run the
+    # Unix socket backend in tests, or for several workers on one machine:
+    #   python -m app.core.event_bus /tmp/patientportal-events.sock
+    def __init__(self, path: str):
+        self.path = path
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: set = set()
+
+    async def start(self) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._serve, path=self.path, limit=LINE_LIMIT)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.add(writer)
+        try:
+            while line := await reader.readline():
+                for client in list(self._writers):
+                    client.write(line)
+                    await client.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+
+class UnixSocketEventBus(EventBus):
+    # One JSON line per event through a UnixSocketBroker
+    backend = "unix"
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        reader, self._writer = await asyncio.open_unix_connection(self.path, limit=LINE_LIMIT)
+        self._reader_task = asyncio.create_task(self._read(reader))
+
+    async def stop(self) -> None:
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+        self._writer = self._reader_task = None
+
+    async def _forward(self, topic: str, payload: Any) -> bool:
+        if self._writer is None:
+            return False
+        self._writer.write(self._encode(topic, payload).encode("utf-8") + b"\n")
+        await self._writer.drain()
+        return True
+
+    async def _read(self, reader: asyncio.StreamReader) -> None:
+        while line := await reader.readline():
+            await self._receive(line.decode("utf-8"))
+
+
+def postgres_connect_args(database_url: str) -> Dict[str, Any]:
+    # asyncpg.connect() arguments for a SQLAlchemy URL, as the app's engine connects
+    url = make_url(database_url)
+    _, connect_args = url.get_dialect()().create_connect_args(url)
+    return {**connect_args, "ssl": False}
+
+
+def create_event_bus() -> EventBus:
+    if settings.EVENT_BUS == "postgres":
+        return PostgresEventBus(postgres_connect_args(str(settings.DATABASE_URL)), settings.EVENT_BUS_CHANNEL)
+    if settings.EVENT_BUS == "unix":
+        return UnixSocketEventBus(settings.EVENT_BUS_UNIX_PATH)
+    if settings.EVENT_BUS != "inprocess":
+        raise ValueError(f"Unknown event bus '{settings.EVENT_BUS}'")
+    return EventBus()
+
+
+event_bus = create_event_bus()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Unix socket event broker")
+    parser.add_argument("path", nargs="?", default=settings.EVENT_BUS_UNIX_PATH, help="Socket path")
+    args = parser.parse_args()
+
+    async def serve():
+        broker = UnixSocketBroker(args.path)
+        await broker.start()
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
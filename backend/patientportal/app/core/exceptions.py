@@ -3,6 +3,7 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from pydantic import ValidationError
 from sqlalchemy.exc import IntegrityError
+from app.core.password_hasher import HashingOverloadedError
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     errors = [
@@ -32,6 +33,13 @@ async def pydantic_validation_error_handler(request: Request, exc: ValidationErr
         content={"detail": "Validation failed", "errors": errors}
     )
 
+async def hashing_overloaded_exception_handler(request: Request, exc: HashingOverloadedError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please try again shortly"},
+        headers={"Retry-After": "1"},
+    )
+
 async def global_exception_handler(request: Request, exc: Exception):
     if isinstance(exc, RequestValidationError):
         return await validation_exception_handler(request, exc)
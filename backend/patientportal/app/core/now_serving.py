@@ -0,0 +1,64 @@
+from datetime import date
+from typing import Any, Dict, Optional
+from app.core.event_bus import event_bus
+
+
+class NowServing:
+    # The counter of the latest completed request, what GET /counter/last returns.
+    # Loaded from the database once (at startup, on a new day, or after the request
+    # it points at is deleted) and then advanced by every completion, in every
+    # process through the event bus (announce / announce_deleted)
+    def __init__(self):
+        self.loaded = False
+        self.day: Optional[date] = None
+        self.request_id: Optional[int] = None
+        self.counter_id: Optional[int] = None
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.request_id}-{self.counter_id}"'
+
+    def is_current(self, day: date) -> bool:
+        return self.loaded and self.day == day
+
+    def seed(self, request_id: Optional[int], counter_id: Optional[int], *, day: date) -> None:
+        # A completion that landed while the seed query ran is newer, keep it
+        if not self.is_current(day):
+            self.advance(request_id, counter_id, day=day)
+
+    def advance(self, request_id: Optional[int], counter_id: Optional[int], *, day: date) -> None:
+        self.day = day
+        self.request_id = request_id
+        self.counter_id = counter_id
+        self.loaded = True
+
+    def forget(self, request_id: int) -> None:
+        # The request on display is gone, the previous completion takes its place
+        if request_id == self.request_id:
+            self.reset()
+
+    async def announce(self, request_id: int, counter_id: int, *, day: date) -> None:
+        await event_bus.publish(
+            "now_serving.advance",
+            {"request_id": request_id, "counter_id": counter_id, "day": day.isoformat()},
+        )
+
+    async def announce_deleted(self, request_id: int) -> None:
+        await event_bus.publish("now_serving.deleted", {"request_id": request_id})
+
+    async def _on_advance(self, event: Dict[str, Any]) -> None:
+        self.advance(event["request_id"], event["counter_id"], day=date.fromisoformat(event["day"]))
+
+    async def _on_deleted(self, event: Dict[str, Any]) -> None:
+        self.forget(event["request_id"])
+
+    def reset(self) -> None:
+        self.loaded = False
+        self.day = None
+        self.request_id = None
+        self.counter_id = None
+
+
+now_serving = NowServing()
+event_bus.subscribe("now_serving.advance", now_serving._on_advance)
+event_bus.subscribe("now_serving.deleted", now_serving._on_deleted)
@@ -0,0 +1,79 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_password
+
+
+class HashingOverloadedError(Exception):
+    pass
+
+
+class PasswordHasher:
+    # Runs bcrypt on a bounded pool so a login burst can't stall the event loop
+    def __init__(self, workers: int, max_pending: int, executor_kind: str = "thread"):
+        if executor_kind not in ("thread", "process"):
+            raise ValueError("executor_kind must be 'thread' or 'process'.")
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor_kind = executor_kind
+        self._executor: Optional[Executor] = None
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        # Admission control: shed load instead of growing an unbounded queue
+        if self.in_flight >= self.max_pending:
+            self.rejected += 1
+            raise HashingOverloadedError("Too many concurrent password operations")
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executor": self.executor_kind,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "queue_depth": max(0, self.in_flight - self.workers),
+            "peak_in_flight": self.peak_in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    executor_kind=settings.PASSWORD_HASH_EXECUTOR,
+)
@@ -0,0 +1,80 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.event_bus import EventBus, event_bus
+
+
+class PrincipalCache:
+    # Bounded TTL/LRU cache of authenticated users keyed by user id. Every worker
+    # holds its own, evict() drops a user from all of them through the event bus
+    def __init__(self, max_size: int, ttl_seconds: float, bus: EventBus):
+        self.bus = bus
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        bus.subscribe("users.changed", self._on_changed)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, user_id: int) -> Optional[Any]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            self.misses += 1
+            return None
+
+        # Mark as most recently used
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return user
+
+    def set(self, user_id: int, user: Any) -> None:
+        if not self.enabled:
+            return
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, user)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+
+    async def evict(self, user_id: int) -> None:
+        await self.bus.publish("users.changed", {"user_id": user_id})
+
+    async def _on_changed(self, event: Dict[str, Any]) -> None:
+        self.invalidate(event["user_id"])
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    bus=event_bus,
+)
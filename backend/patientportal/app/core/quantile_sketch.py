@@ -0,0 +1,50 @@
+import math
+from collections import defaultdict
+from typing import Dict, Optional
+
+
+class QuantileSketch:
+    # Log-bucketed (DDSketch style) quantile sketch. A value v lands in bucket
+    # ceil(log_gamma(v)), so every quantile it returns is within relative_accuracy
+    # of the exact one, using a few hundred buckets for anything from a second to
+    # a month. Buckets are plain counts: sketches merge by adding them up
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = defaultdict(int)
+        self.count = 0
+
+    def key(self, value: float) -> int:
+        # Everything up to a second shares bucket 0
+        if value <= 1:
+            return 0
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def value(self, key: int) -> float:
+        # Middle of the bucket in relative terms
+        if key <= 0:
+            return 0.0
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value: float) -> None:
+        self.add_bucket(self.key(value), 1)
+
+    def add_bucket(self, key: int, count: int) -> None:
+        self.buckets[key] += count
+        self.count += count
+
+    def merge(self, other: "QuantileSketch") -> None:
+        for key, count in other.buckets.items():
+            self.add_bucket(key, count)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                return self.value(key)
+        return self.value(max(self.buckets))
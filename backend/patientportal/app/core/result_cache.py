@@ -0,0 +1,83 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+from app.core.config import settings
+from app.core.event_bus import EventBus, event_bus
+
+
+class ResultCache:
+    # Short TTL cache for computed query results. invalidate() drops everything and
+    # bumps the generation, so a result computed before an invalidation is not stored.
+    # With a bus and topic, evict() invalidates the cache of every worker
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_size: int,
+        bus: Optional[EventBus] = None,
+        topic: Optional[str] = None,
+    ):
+        self.bus = bus
+        self.topic = topic
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.generation = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        if bus is not None:
+            bus.subscribe(topic, self._on_evicted)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, generation: int) -> None:
+        if self.ttl_seconds <= 0 or generation != self.generation:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        self.generation += 1
+        self.invalidations += 1
+        self._entries.clear()
+
+    async def evict(self) -> None:
+        if self.bus is None:
+            self.invalidate()
+            return
+        await self.bus.publish(self.topic, {})
+
+    async def _on_evicted(self, event: Dict[str, Any]) -> None:
+        self.invalidate()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+# Assignee leaderboard, dropped whenever completions (or assignees) change
+assignee_stats_cache = ResultCache(
+    ttl_seconds=settings.ASSIGNEE_STATS_CACHE_TTL_SECONDS,
+    max_size=256,
+    bus=event_bus,
+    topic="assignee_stats.changed",
+)
+
+# Timeseries ranges that lie entirely in the past, those buckets never change
+# (kept as long as the Cache-Control max-age given to clients)
+timeseries_cache = ResultCache(ttl_seconds=31536000, max_size=512)
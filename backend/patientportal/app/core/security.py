@@ -3,8 +3,13 @@ from typing import Optional
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from app.core.config import settings
+from app.core.token_revocation import token_revocations
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
@@ -21,6 +26,13 @@ def create_access_token(subject: int, role: str, expires_delta: Optional[timedel
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode = {"exp": expire, "sub": str(subject), "role": role}
+    to_encode = {
+        "exp": expire,
+        "iat": datetime.now(timezone.utc),
+        "sub": str(subject),
+        "role": role,
+        # Lets stateless role checks reject tokens issued before a role change or delete
+        "ver": token_revocations.version(int(subject)),
+    }
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
\ No newline at end of file
@@ -0,0 +1,42 @@
+import time
+from typing import Any, Dict
+from app.core.event_bus import EventBus, event_bus
+
+
+class TokenRevocationTable:
+    # Per-user token versions used to revoke stateless JWT claims.
+    # The table lives in process memory, so tokens issued before this process
+    # started (iat < started_at) are never trusted on claims alone.
+    # A version is the time of the revocation in milliseconds, sent to every worker
+    # through the event bus, so all of them agree on it whichever one issued the token
+    def __init__(self, bus: EventBus):
+        self.bus = bus
+        self.started_at = int(time.time())
+        self._versions: Dict[int, int] = {}
+        self.rejected = 0
+        bus.subscribe("users.revoked", self._on_revoked)
+
+    def version(self, user_id: int) -> int:
+        return self._versions.get(user_id, 0)
+
+    async def revoke(self, user_id: int) -> int:
+        version = max(int(time.time() * 1000), self.version(user_id) + 1)
+        await self.bus.publish("users.revoked", {"user_id": user_id, "version": version})
+        return version
+
+    async def _on_revoked(self, event: Dict[str, Any]) -> None:
+        # Versions only go up, whatever order the events arrive in
+        user_id = event["user_id"]
+        self._versions[user_id] = max(self.version(user_id), event["version"])
+
+    def clear(self) -> None:
+        self._versions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tracked_users": len(self._versions),
+            "rejected": self.rejected,
+        }
+
+
+token_revocations = TokenRevocationTable(event_bus)
@@ -1,4 +1,7 @@
 from .crud_user import crud_user
 from .crud_assignee import crud_assignee
 from .crud_request import crud_request
-from .crud_todaycounter import crud_todaycounter
\ No newline at end of file
+from .crud_todaycounter import crud_todaycounter
+from .crud_request_stats import crud_request_stats
+from .crud_request_timeseries import crud_request_timeseries
+from .crud_request_turnaround import crud_request_turnaround
\ No newline at end of file
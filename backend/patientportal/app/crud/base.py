@@ -1,40 +1,51 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Any, AsyncIterator, Dict, Generic, List, Optional, Sequence, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from app.db.base_class import Base
 from sqlalchemy import func
 from datetime import timedelta, datetime, timezone
 from app.core.config import settings
+from app.core.row_encoder import RowEncoder
+from app.crud.pagination import (
+    decode_cursor,
+    encode_cursor,
+    estimate_row_count,
+    keyset_filter,
+    order_clauses,
+    parse_order_by,
+)
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # Used by get_multi when the caller doesn't ask for an ordering
+    default_order_by: str = "+id"
+    # Row encoder for get_multi_json, mirrors the list response schema
+    list_encoder: Optional[RowEncoder] = None
+
     def __init__(self, model: Type[ModelType]):
         self.model = model
 
-    async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
-        query = select(self.model).filter(self.model.id == id)
+    def _apply_options(self, query, options: Sequence[Any]):
+        if options:
+            # Loader options change what gets loaded, so don't keep whatever an
+            # earlier query in this session left on the same objects
+            query = query.options(*options).execution_options(populate_existing=True)
+        return query
+
+    async def get(
+        self, db: AsyncSession, id: Any, *, options: Sequence[Any] = ()
+    ) -> Optional[ModelType]:
+        query = self._apply_options(select(self.model).filter(self.model.id == id), options)
         result = await db.execute(query)
         return result.scalar_one_or_none()
 
-    async def get_multi(
-        self,
-        db: AsyncSession,
-        *,
-        skip: int = 0,
-        limit: int = 100,
-        filters: Optional[Dict[str, Any]] = None
-    ) -> Dict[str, Any]:
-        query = select(self.model)
-
-        # To double check the limit is not too high, and reset it if it is
-        if limit > settings.MAX_FETCH_LIMIT:
-            limit = settings.MAX_FETCH_LIMIT
-
+    def _apply_filters(self, query, filters: Optional[Dict[str, Any]]):
         if filters:
             for attr, value in filters.items():
                 if attr == 'start_date':
@@ -67,21 +78,106 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
                 else:
                     query = query.filter(getattr(self.model, attr) == value)
+        return query
 
-        # Get total count
-        count_result = await db.execute(select(func.count()).select_from(query.subquery()))
-        total = count_result.scalar()
+    def _encoder_query(self, encoder: RowEncoder, order_spec):
+        # Plain column rows for the encoder, plus any sort column it doesn't carry (for the cursor)
+        missing = [name for name, _ in order_spec if name not in encoder.column_names]
+        query = select(
+            *encoder.columns, *[getattr(self.model, name).label(name) for name in missing]
+        ).select_from(self.model)
+        for target, onclause in encoder.joins:
+            query = query.outerjoin(target, onclause)
+        return query
 
-        # Get paginated results
-        query = query.offset(skip).limit(limit)
-        result = await db.execute(query)
-        items = result.scalars().all()
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: Optional[str] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        estimate_total: bool = False,
+        options: Sequence[Any] = (),
+        encoder: Optional[RowEncoder] = None,
+    ) -> Dict[str, Any]:
+        # To double check the limit is not too high, and reset it if it is
+        if limit > settings.MAX_FETCH_LIMIT:
+            limit = settings.MAX_FETCH_LIMIT
+
+        order_spec = parse_order_by(self.model, order_by or self.default_order_by)
+        query = select(self.model) if encoder is None else self._encoder_query(encoder, order_spec)
+        query = self._apply_filters(query, filters)
+
+        # Keyset pagination: seek past the last row of the previous page instead of OFFSET
+        if cursor:
+            query = query.filter(
+                keyset_filter(self.model, order_spec, decode_cursor(self.model, order_spec, cursor))
+            )
+            skip = 0
+
+        total = None
+        if include_total and estimate_total:
+            # Planner statistics only, no rows are counted
+            total = await estimate_row_count(db, query.with_only_columns(self.model.id))
+
+        query = self._apply_options(query, options).order_by(*order_clauses(self.model, order_spec))
+        if include_total and not estimate_total:
+            # Page and exact total in one statement, the window count is taken before LIMIT
+            query = query.add_columns(func.count().over().label("total"))
+
+        # Get paginated results, one extra row tells us whether there is a next page
+        result = await db.execute(query.offset(skip).limit(limit + 1))
+        if encoder is not None:
+            # The encoder reads by position, a trailing total column is simply ignored
+            items = result.all()
+            if include_total and not estimate_total:
+                total = items[0].total if items else 0
+        elif include_total and not estimate_total:
+            rows = result.all()
+            items = [row[0] for row in rows]
+            # No rows means the offset is past the end, so nothing remains either way
+            total = rows[0].total if rows else 0
+        else:
+            items = result.scalars().all()
+        next_cursor = encode_cursor(order_spec, items[limit - 1]) if len(items) > limit else None
 
         return {
-            "remaining": max(0, total - (skip + limit)),
-            "results": items
+            "remaining": max(0, total - (skip + limit)) if total is not None else None,
+            "next_cursor": next_cursor,
+            "results": items[:limit]
         }
 
+    async def get_multi_json(
+        self, db: AsyncSession, *, encoder: Optional[RowEncoder] = None, **kwargs: Any
+    ) -> bytes:
+        # Same page as get_multi, encoded straight from the SQL rows to response bytes
+        encoder = encoder or self.list_encoder
+        page = await self.get_multi(db, encoder=encoder, **kwargs)
+        return encoder.encode_page(page)
+
+    async def stream(
+        self,
+        db: AsyncSession,
+        *,
+        encoder: RowEncoder,
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: Optional[str] = None,
+        batch_size: Optional[int] = None,
+    ) -> AsyncIterator[Sequence[Any]]:
+        # Every matching row in one query through a server-side cursor, handed
+        # out in batches so memory stays flat however many rows there are
+        order_spec = parse_order_by(self.model, order_by or self.default_order_by)
+        query = self._apply_filters(self._encoder_query(encoder, order_spec), filters)
+        query = query.order_by(*order_clauses(self.model, order_spec))
+        result = await db.stream(
+            query.execution_options(yield_per=batch_size or settings.EXPORT_BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            yield rows
 
     async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
@@ -91,14 +187,46 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         await db.refresh(db_obj)
         return db_obj
 
+    def _column_values(self, obj_in: Union[UpdateSchemaType, Dict[str, Any]]) -> Dict[str, Any]:
+        # Only mapped columns can go into an UPDATE, anything else is a caller bug
+        data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
+        columns = self.model.__mapper__.columns.keys()
+        unknown = [name for name in data if name not in columns]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return data
+
+    def _column_state(self, db_obj: ModelType) -> Dict[str, Any]:
+        # Loaded column values, unloaded (deferred/expired) ones are left out
+        return {
+            attr.key: db_obj.__dict__[attr.key]
+            for attr in self.model.__mapper__.column_attrs
+            if attr.key in db_obj.__dict__
+        }
+
+    async def _on_updated(
+        self, db: AsyncSession, *, db_obj: ModelType, previous: Dict[str, Any]
+    ) -> None:
+        # Runs before the update commits, for data that has to change in the same transaction
+        pass
+
+    async def _on_committed(self, *, db_obj: ModelType, previous: Dict[str, Any]) -> None:
+        # Runs once the update is committed, for process memory (caches, sketches) that
+        # must not see changes a failed commit would undo
+        pass
+
     async def update(
         self,
         db: AsyncSession,
         *,
         db_obj: ModelType,
-        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
-    ) -> ModelType:
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        fast: bool = False,
+    ) -> Optional[ModelType]:
+        if fast:
+            return await self._update_returning(db, db_obj=db_obj, obj_in=obj_in)
         obj_data = jsonable_encoder(db_obj)
+        previous = self._column_state(db_obj)
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
@@ -107,12 +235,76 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             if field in update_data:
                 setattr(db_obj, field, update_data[field])
         db.add(db_obj)
+        await db.flush()
+        await self._on_updated(db, db_obj=db_obj, previous=previous)
         await db.commit()
         await db.refresh(db_obj)
+        await self._on_committed(db_obj=db_obj, previous=previous)
+        return db_obj
+
+    async def _update_returning(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+    ) -> Optional[ModelType]:
+        # One UPDATE ... WHERE id = ... RETURNING * and the commit. The returned row
+        # is written onto db_obj as committed state, so there is no refresh and the
+        # relationships already loaded on it are kept. The previous values of the
+        # updated columns come from the locked row, not from db_obj (read unlocked),
+        # so concurrent updates each see the state the other one left
+        values = self._column_values(obj_in)
+        if values:
+            column_attrs = self.model.__mapper__.column_attrs
+            locked = (
+                select(self.model.id, *[getattr(self.model, key) for key in values])
+                .where(self.model.id == db_obj.id)
+                .with_for_update()
+                .subquery("previous")
+            )
+            result = await db.execute(
+                update(self.model)
+                .where(self.model.id == locked.c.id)
+                .values(**values)
+                .returning(
+                    *[attr.class_attribute for attr in column_attrs],
+                    *[locked.c[key].label(f"previous_{key}") for key in values],
+                )
+                .execution_options(synchronize_session=False)
+            )
+            row = result.one_or_none()
+            if row is None:
+                # Deleted in the meantime
+                await db.rollback()
+                return None
+            previous = {
+                **self._column_state(db_obj),
+                **{key: getattr(row, f"previous_{key}") for key in values},
+            }
+            for attr in column_attrs:
+                set_committed_value(db_obj, attr.key, getattr(row, attr.key))
+            await self._on_updated(db, db_obj=db_obj, previous=previous)
+            await db.commit()
+            await self._on_committed(db_obj=db_obj, previous=previous)
+            return db_obj
+        # Nothing to set, still answer None for a row deleted in the meantime
+        result = await db.execute(select(self.model.id).where(self.model.id == db_obj.id))
+        if result.scalar_one_or_none() is None:
+            await db.rollback()
+            return None
+        await db.commit()
         return db_obj
 
-    async def remove(self, db: AsyncSession, *, id: int) -> ModelType:
-        obj = await db.get(self.model, id)
-        await db.delete(obj)
+    async def remove(
+        self, db: AsyncSession, *, id: int, where: Sequence[Any] = ()
+    ) -> Optional[ModelType]:
+        # One DELETE ... RETURNING, children are handled by the ON DELETE rules in
+        # the database instead of being loaded into the session. None if no row
+        # with this id (and matching `where`) exists
+        result = await db.execute(
+            delete(self.model).where(self.model.id == id, *where).returning(self.model)
+        )
+        obj = result.scalar_one_or_none()
         await db.commit()
         return obj
\ No newline at end of file
@@ -1,13 +1,89 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import and_, func, select
 from app.crud.base import CRUDBase
+from app.core.row_encoder import RowEncoder
 from app.models.assignee import Assignee
+from app.models.request import Request
+from app.core.result_cache import assignee_stats_cache
 from app.schemas.assignee import AssigneeCreate, AssigneeUpdate
+from app.schemas.request import Status
 from app.core.config import settings
 
 class CRUDAssignee(CRUDBase[Assignee, AssigneeCreate, AssigneeUpdate]):
+    # Same layout as AssigneeResponse
+    list_encoder = RowEncoder([
+        ("full_name", Assignee.full_name),
+        ("id", Assignee.id),
+    ])
+
+    LEADERBOARD_ORDERS = ("id", "completed_desc")
+
+    async def create(self, db: AsyncSession, *, obj_in: AssigneeCreate) -> Assignee:
+        assignee = await super().create(db, obj_in=obj_in)
+        await assignee_stats_cache.evict()
+        return assignee
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Assignee,
+        obj_in: Union[AssigneeUpdate, Dict[str, Any]],
+        fast: bool = False,
+    ) -> Optional[Assignee]:
+        assignee = await super().update(db, db_obj=db_obj, obj_in=obj_in, fast=fast)
+        await assignee_stats_cache.evict()
+        return assignee
+
+    async def remove(self, db: AsyncSession, *, id: int, **kwargs: Any) -> Optional[Assignee]:
+        assignee = await super().remove(db, id=id, **kwargs)
+        await assignee_stats_cache.evict()
+        return assignee
+
+    async def get_leaderboard(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        order: str = "id",
+    ) -> List[Dict[str, Any]]:
+        # Completed requests per assignee in one GROUP BY, optionally only those
+        # completed inside [start, end]. Assignees with none are listed with 0
+        if order not in self.LEADERBOARD_ORDERS:
+            raise ValueError(f"Order must be one of: {', '.join(self.LEADERBOARD_ORDERS)}")
+        key = (skip, limit, start, end, order)
+        cached = assignee_stats_cache.get(key)
+        if cached is not None:
+            return cached
+        generation = assignee_stats_cache.generation
+
+        joined = [Request.assigned_to == Assignee.id, Request.status == Status.COMPLETED]
+        if start is not None:
+            joined.append(Request.updated_at >= start)
+        if end is not None:
+            joined.append(Request.updated_at <= end)
+        completed = func.count(Request.id).label("completed")
+        query = (
+            select(Assignee.full_name, completed)
+            .outerjoin(Request, and_(*joined))
+            .group_by(Assignee.id)
+        )
+        if order == "completed_desc":
+            query = query.order_by(completed.desc(), Assignee.id)
+        else:
+            query = query.order_by(Assignee.id)
+        result = await db.execute(query.offset(skip).limit(limit))
+        stats = [dict(row) for row in result.mappings().all()]
+
+        assignee_stats_cache.set(key, stats, generation)
+        return stats
+
     async def get_by_name(self, db: AsyncSession, *, full_name: str) -> Optional[Assignee]:
         query = select(Assignee).filter(Assignee.full_name == full_name)
         result = await db.execute(query)
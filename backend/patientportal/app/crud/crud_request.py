@@ -1,25 +1,391 @@
-from typing import List, Optional, Dict, Any
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Union
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import delete, insert, select, true, update
+from sqlalchemy.orm import joinedload, load_only, raiseload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
 from app.crud.base import CRUDBase
+from app.crud.pagination import parse_order_by
+from app.crud.crud_request_stats import crud_request_stats, status_counts
+from app.crud.crud_request_timeseries import crud_request_timeseries
+from app.crud.crud_request_turnaround import crud_request_turnaround
+from app.crud.crud_todaycounter import crud_todaycounter
+from app.core.result_cache import assignee_stats_cache
+from app.core.row_encoder import Nested, RowEncoder
 from app.models.request import Request
-from app.schemas.request import RequestCreate, RequestUpdate
-from datetime import timedelta, datetime, timezone
+from app.models.user import User
+from app.models.assignee import Assignee
+from app.models.today_counter import TodayCounter
+from app.schemas.request import RequestCreate, RequestUpdate, Status
 from app.core.config import settings
 
 class CRUDRequest(CRUDBase[Request, RequestCreate, RequestUpdate]):
-    async def create(
+    default_order_by = "-updated_at, -created_at"
+
+    RELATIONSHIPS = ("creator", "assignee", "counter")
+    # Named loader profiles: which relationships are joined in, and how much of them.
+    # "list" only pulls the columns the list responses render (no password hash etc.)
+    LOADER_PROFILES = {
+        "minimal": {},
+        "list": {
+            "creator": (User.id, User.username, User.role),
+            "assignee": None,
+            "counter": (TodayCounter.id, TodayCounter.request_id),
+        },
+        "detail": {"creator": None, "assignee": None, "counter": None},
+    }
+    _list_encoders: Dict[tuple, RowEncoder] = {}
+
+    def loader_options(
+        self,
+        *,
+        profile: str = "detail",
+        include: Optional[Sequence[str]] = None,
+        fields: Optional[Sequence[str]] = None,
+        required_fields: Sequence[str] = ("id",),
+    ) -> List[Any]:
+        if profile not in self.LOADER_PROFILES:
+            raise ValueError(f"Unknown loader profile '{profile}'")
+        relationships = self.LOADER_PROFILES[profile]
+        if include is not None:
+            unknown = set(include) - set(self.RELATIONSHIPS)
+            if unknown:
+                raise ValueError(f"Can't include: {', '.join(sorted(unknown))}")
+            relationships = {name: relationships.get(name) for name in include}
+
+        options = []
+        for name in self.RELATIONSHIPS:
+            attribute = getattr(Request, name)
+            if name not in relationships:
+                # Skip the join entirely, reading the relationship raises instead of loading
+                options.append(raiseload(attribute))
+            elif relationships[name] is None:
+                options.append(joinedload(attribute))
+            else:
+                options.append(joinedload(attribute).load_only(*relationships[name]))
+
+        if fields is not None:
+            columns = Request.__table__.columns
+            unknown = [name for name in fields if name not in columns]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+            names = dict.fromkeys([*required_fields, *fields])
+            options.append(load_only(*[getattr(Request, name) for name in names]))
+        return options
+
+    async def get(
+        self,
+        db: AsyncSession,
+        id: Any,
+        *,
+        profile: str = "detail",
+        include: Optional[Sequence[str]] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Optional[Request]:
+        options = self.loader_options(profile=profile, include=include, fields=fields)
+        return await super().get(db, id, options=options)
+
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        *,
+        profile: str = "list",
+        include: Optional[Sequence[str]] = None,
+        fields: Optional[Sequence[str]] = None,
+        order_by: Optional[str] = None,
+        encoder: Optional[RowEncoder] = None,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        options = []
+        if encoder is None:
+            # The cursor is built from the sort columns, so they are always loaded
+            sort_fields = [name for name, _ in parse_order_by(Request, order_by or self.default_order_by)]
+            options = self.loader_options(
+                profile=profile, include=include, fields=fields, required_fields=sort_fields
+            )
+        return await super().get_multi(
+            db, order_by=order_by, options=options, encoder=encoder, **kwargs
+        )
+
+    def build_list_encoder(self, include: Optional[Sequence[str]] = None) -> RowEncoder:
+        # Same layout as RequestResponse with the "list" profile columns; relationships
+        # that aren't included are left null, like read_request renders them
+        include = tuple(self.RELATIONSHIPS if include is None else include)
+        unknown = set(include) - set(self.RELATIONSHIPS)
+        if unknown:
+            raise ValueError(f"Can't include: {', '.join(sorted(unknown))}")
+        if include in self._list_encoders:
+            return self._list_encoders[include]
+
+        related = {
+            "assignee": Nested([("full_name", Assignee.full_name), ("id", Assignee.id)]),
+            "creator": Nested([("username", User.username), ("role", User.role), ("id", User.id)]),
+            "counter": Nested([("id", TodayCounter.id)]),
+        }
+        joins = {
+            "assignee": (Assignee, Request.assigned_to == Assignee.id),
+            "creator": (User, Request.created_by == User.id),
+            "counter": (TodayCounter, TodayCounter.request_id == Request.id),
+        }
+        encoder = RowEncoder(
+            [
+                ("full_name", Request.full_name),
+                ("national_id", Request.national_id),
+                ("medical_number", Request.medical_number),
+                ("id", Request.id),
+                ("assignee", related["assignee"] if "assignee" in include else None),
+                ("creator", related["creator"] if "creator" in include else None),
+                ("created_at", Request.created_at),
+                ("updated_at", Request.updated_at),
+                ("notes", Request.notes),
+                ("status", Request.status),
+                ("counter", related["counter"] if "counter" in include else None),
+            ],
+            joins=[joins[name] for name in self.RELATIONSHIPS if name in include],
+        )
+        self._list_encoders[include] = encoder
+        return encoder
+
+    async def get_multi_json(
+        self, db: AsyncSession, *, include: Optional[Sequence[str]] = None, **kwargs: Any
+    ) -> bytes:
+        return await super().get_multi_json(db, encoder=self.build_list_encoder(include), **kwargs)
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Request,
+        obj_in: Union[RequestUpdate, Dict[str, Any]],
+        fast: bool = False,
+    ) -> Optional[Request]:
+        request = await super().update(db, db_obj=db_obj, obj_in=obj_in, fast=fast)
+        if fast and request is not None:
+            # The RETURNING row only carries columns, point the assignee at the new id
+            # (from the identity map when it's already loaded, otherwise by primary key)
+            assignee = await db.get(Assignee, request.assigned_to) if request.assigned_to else None
+            set_committed_value(request, "assignee", assignee)
+        return request
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[Dict[str, Any]]:
+        # One DELETE ... RETURNING; RETURNING can't join, so the related values come
+        # from scalar subqueries (they still see the counter the cascade removes).
+        # The daily stats are taken down by a CTE in the same statement
+        def related(column, on):
+            return select(column).where(on).scalar_subquery()
+
+        deleted = (
+            delete(Request).where(Request.id == id).returning(
+                Request.id, Request.full_name, Request.national_id, Request.medical_number,
+                Request.notes, Request.status, Request.assigned_to, Request.created_by,
+                Request.created_at, Request.updated_at,
+                related(Assignee.full_name, Assignee.id == Request.assigned_to).label("assignee_full_name"),
+                related(User.username, User.id == Request.created_by).label("creator_username"),
+                related(User.role, User.id == Request.created_by).label("creator_role"),
+                related(TodayCounter.id, TodayCounter.request_id == Request.id).label("counter_id"),
+            )
+            .cte("deleted")
+        )
+        stats = crud_request_stats.upsert_from(deleted.c.created_at, deleted.c.status, sign=-1)
+        result = await db.execute(select(deleted).add_cte(stats.cte("deleted_stats")))
+        row = result.mappings().one_or_none()
+        await db.commit()
+        if row is not None and row["status"] == Status.COMPLETED:
+            await assignee_stats_cache.evict()
+        # A plain statement doesn't touch the session, drop the stale instance ourselves
+        instance = db.sync_session.identity_map.get(identity_key(Request, id))
+        if instance is not None:
+            db.expunge(instance)
+        if row is None:
+            return None
+        return {
+            **{key: row[key] for key in (
+                "id", "full_name", "national_id", "medical_number", "notes", "status",
+                "created_at", "updated_at",
+            )},
+            "assignee": {"id": row["assigned_to"], "full_name": row["assignee_full_name"]}
+            if row["assigned_to"] is not None else None,
+            "creator": {"id": row["created_by"], "username": row["creator_username"], "role": row["creator_role"]}
+            if row["created_by"] is not None else None,
+            "counter": {"id": row["counter_id"]} if row["counter_id"] is not None else None,
+        }
+
+    async def _on_updated(
+        self, db: AsyncSession, *, db_obj: Request, previous: Dict[str, Any]
+    ) -> None:
+        # Move the request between the pending and completed counts of its day
+        if "status" in previous and previous["status"] != db_obj.status:
+            await crud_request_stats.apply(db, [
+                (db_obj.created_at, status_counts(previous["status"], -1)),
+                (db_obj.created_at, status_counts(db_obj.status)),
+            ])
+            if db_obj.status == Status.COMPLETED:
+                await crud_request_timeseries.record(
+                    db, completed=[(db_obj.created_at, self._completed_at(db_obj))]
+                )
+
+    async def _on_committed(self, *, db_obj: Request, previous: Dict[str, Any]) -> None:
+        # In-memory, so only once the commit went through (as update_many does)
+        if "status" in previous and previous["status"] != db_obj.status and db_obj.status == Status.COMPLETED:
+            crud_request_turnaround.add(db_obj.created_at, self._completed_at(db_obj))
+        # Completions per assignee changed
+        if any(previous.get(name) != getattr(db_obj, name) for name in ("status", "assigned_to")):
+            await assignee_stats_cache.evict()
+
+    @staticmethod
+    def _completed_at(db_obj: Request) -> datetime:
+        # Not loaded yet after a plain flush (server side onupdate), it's about now then
+        return db_obj.__dict__.get("updated_at") or datetime.now(timezone.utc)
+
+    async def create_with_counter(
         self, db: AsyncSession, *, obj_in: RequestCreate, created_by: int
-    ) -> Request:
-        data = obj_in.model_dump(exclude={"is_guest"})
-        db_obj = Request(
-            **data,
-            created_by=created_by
+    ) -> Dict[str, Any]:
+        # The request and its ticket in a single statement:
+        #   WITH new_request AS (INSERT INTO requests ... RETURNING ...),
+        #        ticket AS (INSERT INTO counter_days ... ON CONFLICT DO UPDATE ... RETURNING ...),
+        #        new_counter AS (INSERT INTO today_counter SELECT ... FROM ticket JOIN new_request ON true RETURNING ...)
+        #   SELECT ... FROM new_request JOIN new_counter
+        # plus the rollup upserts, followed by the only commit, so no refreshes are needed
+        new_request = (
+            insert(Request)
+            # Column defaults aren't applied to an INSERT inside a CTE, so status is explicit
+            .values(
+                **obj_in.model_dump(exclude={"is_guest"}),
+                created_by=created_by,
+                status=Status.PENDING,
+            )
+            .returning(
+                Request.id, Request.full_name, Request.national_id, Request.medical_number,
+                Request.notes, Request.status, Request.created_at, Request.updated_at,
+            )
+            .cte("new_request")
+        )
+        ticket = crud_todaycounter.allocate().cte("ticket")
+        new_counter = (
+            insert(TodayCounter)
+            .from_select(
+                [TodayCounter.day, TodayCounter.id, TodayCounter.request_id],
+                # Both CTEs return one row, joined explicitly rather than as a cartesian product
+                select(ticket.c.day, ticket.c.last_number, new_request.c.id)
+                .select_from(ticket.join(new_request, true())),
+            )
+            .returning(TodayCounter.id, TodayCounter.request_id)
+            .cte("new_counter")
+        )
+        # The day's and hour's rollup rows are bumped by more CTEs in the same statement
+        new_stats = crud_request_stats.upsert_from(
+            new_request.c.created_at, new_request.c.status
+        ).cte("new_stats")
+        new_hourly = crud_request_timeseries.created_from(new_request.c.created_at).cte("new_hourly")
+        result = await db.execute(
+            select(new_request, new_counter.c.id.label("counter_id"))
+            .join(new_counter, new_counter.c.request_id == new_request.c.id)
+            .add_cte(new_stats, new_hourly)
         )
-        db.add(db_obj)
+        row = result.mappings().one()
         await db.commit()
-        await db.refresh(db_obj)
-        return db_obj
+        return {
+            **{key: value for key, value in row.items() if key != "counter_id"},
+            "counter": {"id": row["counter_id"]},
+        }
+
+    async def create_many(
+        self, db: AsyncSession, *, objs_in: Sequence[RequestCreate], created_by: int
+    ) -> List[Dict[str, Any]]:
+        # All requests and their counters in one transaction: one multi-row
+        # INSERT ... RETURNING per table and a single commit, no refreshes
+        request_rows = (await db.execute(
+            insert(Request).returning(
+                Request.id, Request.full_name, Request.national_id, Request.medical_number,
+                Request.notes, Request.status, Request.created_at, Request.updated_at,
+                sort_by_parameter_order=True,
+            ),
+            [
+                {**obj_in.model_dump(exclude={"is_guest"}), "created_by": created_by}
+                for obj_in in objs_in
+            ],
+        )).mappings().all()
+        # Reserve the batch's ticket numbers in one go, then number the requests in order
+        day, last_number = (await db.execute(crud_todaycounter.allocate(len(request_rows)))).one()
+        counter_ids = range(last_number - len(request_rows) + 1, last_number + 1)
+        await db.execute(
+            insert(TodayCounter),
+            [
+                {"day": day, "id": counter_id, "request_id": row["id"]}
+                for row, counter_id in zip(request_rows, counter_ids)
+            ],
+        )
+        await crud_request_stats.apply(
+            db, [(row["created_at"], status_counts(row["status"])) for row in request_rows]
+        )
+        await crud_request_timeseries.record(db, created=[row["created_at"] for row in request_rows])
+        await db.commit()
+        return [
+            {**row, "counter": {"id": counter_id}}
+            for row, counter_id in zip(request_rows, counter_ids)
+        ]
+
+    async def update_many(
+        self,
+        db: AsyncSession,
+        *,
+        ids: Sequence[int],
+        obj_in: RequestUpdate,
+        include_completed: bool = True,
+    ) -> List[Dict[str, Any]]:
+        # Completes every request in `ids` with one set-based UPDATE ... RETURNING,
+        # the counter id and day come back from correlated subqueries in the same statement
+        # and the previous status (for the daily stats) from the locked pre-update rows
+        values = obj_in.model_dump(exclude_unset=True, exclude={"ids"})
+        previous = (
+            select(Request.id, Request.status)
+            .where(Request.id.in_(ids))
+            .with_for_update()
+            .subquery("previous")
+        )
+        query = update(Request).where(Request.id == previous.c.id)
+        if not include_completed:
+            query = query.where(Request.status != Status.COMPLETED)
+        def counter(column, label):
+            return select(column).where(TodayCounter.request_id == Request.id).scalar_subquery().label(label)
+
+        result = await db.execute(
+            query.values(**values, status=Status.COMPLETED).returning(
+                Request.id, Request.full_name, Request.national_id, Request.medical_number,
+                Request.notes, Request.status, Request.assigned_to, Request.created_at,
+                Request.updated_at, counter(TodayCounter.id, "counter_id"),
+                counter(TodayCounter.day, "counter_day"), previous.c.status.label("previous_status"),
+            )
+        )
+        rows = result.mappings().all()
+        await crud_request_stats.apply(db, [
+            change
+            for row in rows if row["previous_status"] != row["status"]
+            for change in (
+                (row["created_at"], status_counts(row["previous_status"], -1)),
+                (row["created_at"], status_counts(row["status"])),
+            )
+        ])
+        completed = [
+            (row["created_at"], row["updated_at"])
+            for row in rows
+            if row["previous_status"] != Status.COMPLETED and row["status"] == Status.COMPLETED
+        ]
+        await crud_request_timeseries.record(db, completed=completed)
+        await db.commit()
+        for created_at, completed_at in completed:
+            crud_request_turnaround.add(created_at, completed_at)
+        if rows:
+            await assignee_stats_cache.evict()
+        # counter_day is kept for the caller (ticket numbers restart every day)
+        return [
+            {
+                **{key: value for key, value in row.items() if key not in ("counter_id", "previous_status")},
+                "counter": {"id": row["counter_id"]} if row["counter_id"] is not None else None,
+            }
+            for row in rows
+        ]
 
     async def get_by_user(
         self, db: AsyncSession, *, user_id: int, skip: int = 0, limit: int = 100
@@ -51,75 +417,5 @@ class CRUDRequest(CRUDBase[Request, RequestCreate, RequestUpdate]):
         result = await db.execute(query)
         return result.scalars().all()
 
-    async def get_multi(
-        self, 
-        db: AsyncSession, 
-        *, 
-        skip: int = 0, 
-        limit: int = 100,
-        filters: Dict[str, Any] = None,
-        order_by: Optional[str] = "-updated_at, -created_at",
-    ) -> Dict[str, Any]:
-
-        # To double check the limit is not too high, and reset it if it is
-        if limit > settings.MAX_FETCH_LIMIT:
-            limit = settings.MAX_FETCH_LIMIT
-        
-        query = select(self.model)
-        
-        if filters:
-            for attr, value in filters.items():
-                if attr == 'start_date':
-                    if isinstance(value, str):
-                        start_date = datetime.strptime(value, "%Y-%m-%d")
-                    elif isinstance(value, datetime):
-                        start_date = value
-                    else:
-                        raise ValueError("start_date must be a string or datetime object.")
-                    
-                    # Ensure it's timezone-aware
-                    if start_date.tzinfo is None:
-                        start_date = start_date.replace(tzinfo=timezone.utc)
-
-                    query = query.filter(self.model.created_at >= start_date)
-
-                elif attr == 'end_date':
-                    if isinstance(value, str):
-                        end_date = datetime.strptime(value, "%Y-%m-%d")
-                    elif isinstance(value, datetime):
-                        end_date = value
-                    else:
-                        raise ValueError("end_date must be a string or datetime object.")
-                    
-                    # Ensure it's timezone-aware
-                    if end_date.tzinfo is None:
-                        end_date = end_date.replace(tzinfo=timezone.utc)
-
-                    query = query.filter(self.model.created_at <= end_date)
-                
-                else:
-                    query = query.filter(getattr(self.model, attr) == value)
-
-        # Handling order_by
-        order_by = order_by.split(", ")
-        for order in order_by:
-            if order[0] == "-":
-                query = query.order_by(getattr(self.model, order[1:]).desc())
-            elif order[0] == "+":
-                query = query.order_by(getattr(self.model, order[1:]).asc())
-        
-        # Get total count
-        count_result = await db.execute(select(func.count()).select_from(query.subquery()))
-        total = count_result.scalar()
-
-        # Get paginated results
-        result = await db.execute(query.offset(skip).limit(limit))
-        items = result.scalars().all()
-
-        return {
-            "remaining": max(0, total - (skip + limit)),
-            "results": items
-        }
-
 
 crud_request = CRUDRequest(Request)
\ No newline at end of file
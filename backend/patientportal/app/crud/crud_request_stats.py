@@ -0,0 +1,81 @@
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import Date, case, cast, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.request_daily_stats import RequestDailyStats
+from app.schemas.request import Status
+
+COUNTERS = ("total", "completed", "pending")
+
+
+def utc_day(created_at):
+    # The rollup day of a request, for a SQL expression or a datetime
+    if isinstance(created_at, datetime):
+        return created_at.astimezone(timezone.utc).date()
+    return cast(func.timezone("UTC", created_at), Date)
+
+
+def status_counts(status: Optional[str], sign: int = 1) -> Dict[str, int]:
+    return {
+        "total": sign,
+        "completed": sign if status == Status.COMPLETED else 0,
+        "pending": sign if status == Status.PENDING else 0,
+    }
+
+
+class CRUDRequestStats:
+    # Per-day rollups behind GET /requests/stats. Writers call these before their
+    # commit so the counts change in the same transaction as the requests
+
+    def _upsert(self, rows):
+        stmt = insert(RequestDailyStats)
+        stmt = stmt.values(rows) if isinstance(rows, list) else stmt.from_select(["day", *COUNTERS], rows)
+        table = RequestDailyStats.__table__
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.day],
+            set_={name: table.c[name] + stmt.excluded[name] for name in COUNTERS},
+        )
+
+    def upsert_from(self, created_at, status, sign: int = 1):
+        # INSERT ... ON CONFLICT for rows coming out of a CTE (no round trip of its own),
+        # sign=-1 takes them out again
+        day = utc_day(created_at)
+        rows = select(
+            day,
+            sign * func.count(),
+            sign * func.count(case((status == Status.COMPLETED, 1))),
+            sign * func.count(case((status == Status.PENDING, 1))),
+        ).group_by(day)
+        return self._upsert(rows)
+
+    async def apply(self, db: AsyncSession, changes: Iterable[tuple]) -> None:
+        # changes: (created_at, counts) pairs, see status_counts(); one statement per call
+        deltas: Dict[date, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        for created_at, counts in changes:
+            day = deltas[utc_day(created_at)]
+            for name in COUNTERS:
+                day[name] += counts[name]
+        rows = [
+            {"day": day, **counts} for day, counts in deltas.items() if any(counts.values())
+        ]
+        if rows:
+            await db.execute(self._upsert(rows))
+
+    async def summary(self, db: AsyncSession, *, day: date, year_start: date) -> Dict[str, int]:
+        # At most one row per day of the year
+        result = await db.execute(
+            select(
+                func.coalesce(func.sum(RequestDailyStats.total), 0).label("total"),
+                func.coalesce(func.sum(RequestDailyStats.completed), 0).label("completed"),
+                func.coalesce(func.sum(RequestDailyStats.pending), 0).label("pending"),
+                func.coalesce(
+                    func.sum(case((RequestDailyStats.day == day, RequestDailyStats.total), else_=0)), 0
+                ).label("today"),
+            ).filter(RequestDailyStats.day >= year_start)
+        )
+        return dict(result.mappings().one())
+
+
+crud_request_stats = CRUDRequestStats()
@@ -0,0 +1,93 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Tuple
+from sqlalchemy import func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.request_hourly_stats import RequestHourlyStats
+
+COUNTERS = ("created", "completed", "turnaround_seconds")
+GRANULARITIES = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+
+def utc_trunc(unit: str, value):
+    # Start of the UTC hour/day, for a SQL expression or a datetime
+    if isinstance(value, datetime):
+        value = value.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        return value.replace(hour=0) if unit == "day" else value
+    return func.timezone("UTC", func.date_trunc(unit, func.timezone("UTC", value)))
+
+
+class CRUDRequestTimeseries:
+    # Hourly created/completed rollups behind GET /requests/stats/timeseries. They
+    # record events (a creation, a completion), so deleting a request later doesn't
+    # rewrite history and finished hours stay immutable
+
+    def _upsert(self, rows):
+        stmt = insert(RequestHourlyStats)
+        stmt = stmt.values(rows) if isinstance(rows, list) else stmt.from_select(["hour", *COUNTERS], rows)
+        table = RequestHourlyStats.__table__
+        updated = COUNTERS if isinstance(rows, list) else ("created",)
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.hour],
+            set_={name: table.c[name] + stmt.excluded[name] for name in updated},
+        )
+
+    def created_from(self, created_at):
+        # INSERT ... ON CONFLICT counting the rows of a CTE as created. Column defaults
+        # aren't applied inside a CTE, so the other counters are explicit zeros
+        hour = utc_trunc("hour", created_at)
+        return self._upsert(select(hour, func.count(), literal(0), literal(0.0)).group_by(hour))
+
+    async def record(
+        self,
+        db: AsyncSession,
+        *,
+        created: Iterable[datetime] = (),
+        completed: Iterable[Tuple[datetime, datetime]] = (),
+    ) -> None:
+        # created: creation times, completed: (created at, completed at) pairs
+        hours: Dict[datetime, Dict[str, Any]] = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        for created_at in created:
+            hours[utc_trunc("hour", created_at)]["created"] += 1
+        for created_at, completed_at in completed:
+            hour = hours[utc_trunc("hour", completed_at)]
+            hour["completed"] += 1
+            hour["turnaround_seconds"] += (completed_at - created_at).total_seconds()
+        if hours:
+            await db.execute(self._upsert([{"hour": hour, **counts} for hour, counts in hours.items()]))
+
+    async def series(
+        self, db: AsyncSession, *, granularity: str, start: datetime, end: datetime
+    ) -> List[Dict[str, Any]]:
+        # Every bucket starting before end, from the one holding start; empty ones as zeros
+        step = GRANULARITIES[granularity]
+        start = utc_trunc(granularity, start)
+        bucket = utc_trunc(granularity, RequestHourlyStats.hour).label("bucket")
+        result = await db.execute(
+            select(
+                bucket,
+                func.sum(RequestHourlyStats.created).label("created"),
+                func.sum(RequestHourlyStats.completed).label("completed"),
+                func.sum(RequestHourlyStats.turnaround_seconds).label("turnaround_seconds"),
+            )
+            .where(RequestHourlyStats.hour >= start, RequestHourlyStats.hour < end)
+            .group_by(bucket)
+        )
+        rows = {row.bucket: row for row in result.all()}
+
+        series = []
+        while start < end:
+            row = rows.get(start)
+            completed = row.completed if row else 0
+            series.append({
+                "start": start,
+                "created": row.created if row else 0,
+                "completed": completed,
+                "mean_turnaround_seconds": row.turnaround_seconds / completed if completed else None,
+            })
+            start += step
+        return series
+
+
+crud_request_timeseries = CRUDRequestTimeseries()
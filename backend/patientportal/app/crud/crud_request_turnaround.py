@@ -0,0 +1,99 @@
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.quantile_sketch import QuantileSketch
+from app.crud.crud_request_stats import utc_day
+from app.models.request_turnaround_sketch import RequestTurnaroundSketch
+
+logger = logging.getLogger(__name__)
+
+# Stored bucket keys depend on it, changing it means rebuilding the table
+SKETCH_ACCURACY = 0.01
+QUANTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+
+def describe(sketch: QuantileSketch) -> Dict[str, Any]:
+    return {
+        "count": sketch.count,
+        **{name: sketch.quantile(q) for name, q in QUANTILES.items()},
+    }
+
+
+class CRUDRequestTurnaround:
+    # Turnaround quantiles behind GET /requests/stats/turnaround. Completions are
+    # sketched in memory and added to the stored per-day sketches by flush(), which
+    # runs every TURNAROUND_FLUSH_SECONDS and before every read, so completing a
+    # request costs no query. Reads merge at most 7 days of buckets
+    def __init__(self):
+        self._pending: Dict[date, QuantileSketch] = {}
+
+    def add(self, created_at: datetime, completed_at: datetime) -> None:
+        day = utc_day(completed_at)
+        sketch = self._pending.get(day)
+        if sketch is None:
+            sketch = self._pending[day] = QuantileSketch(SKETCH_ACCURACY)
+        sketch.add((completed_at - created_at).total_seconds())
+
+    async def flush(self, db: AsyncSession) -> None:
+        pending, self._pending = self._pending, {}
+        # Sorted so concurrent flushes from other workers lock rows in the same order
+        rows = sorted(
+            (day, key, count)
+            for day, sketch in pending.items()
+            for key, count in sketch.buckets.items()
+        )
+        if not rows:
+            return
+        stmt = insert(RequestTurnaroundSketch).values(
+            [{"day": day, "bucket": key, "count": count} for day, key, count in rows]
+        )
+        table = RequestTurnaroundSketch.__table__
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.day, table.c.bucket],
+            set_={"count": table.c.count + stmt.excluded.count},
+        )
+        try:
+            await db.execute(stmt)
+            await db.commit()
+        except Exception:
+            # Keep them for the next flush
+            await db.rollback()
+            for day, sketch in pending.items():
+                self._pending.setdefault(day, QuantileSketch(SKETCH_ACCURACY)).merge(sketch)
+            raise
+
+    async def flush_periodically(self, session_factory: Callable[[], AsyncSession], interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with session_factory() as db:
+                    await self.flush(db)
+            except Exception:
+                logger.exception("Flushing turnaround sketches failed")
+
+    async def summary(self, db: AsyncSession, *, today: date) -> Dict[str, Dict[str, Optional[float]]]:
+        await self.flush(db)
+        result = await db.execute(
+            select(
+                RequestTurnaroundSketch.day,
+                RequestTurnaroundSketch.bucket,
+                RequestTurnaroundSketch.count,
+            ).where(
+                RequestTurnaroundSketch.day > today - timedelta(days=7),
+                RequestTurnaroundSketch.day <= today,
+            )
+        )
+        day_sketch = QuantileSketch(SKETCH_ACCURACY)
+        week_sketch = QuantileSketch(SKETCH_ACCURACY)
+        for row in result.all():
+            week_sketch.add_bucket(row.bucket, row.count)
+            if row.day == today:
+                day_sketch.add_bucket(row.bucket, row.count)
+        return {"today": describe(day_sketch), "last_7_days": describe(week_sketch)}
+
+
+crud_request_turnaround = CRUDRequestTurnaround()
@@ -1,9 +1,81 @@
+import asyncio
+import logging
+from datetime import date, datetime
+from typing import Callable, Optional
+from zoneinfo import ZoneInfo
+from sqlalchemy import Date, cast, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
 from app.crud.base import CRUDBase
+from app.core.now_serving import now_serving
+from app.models.counter_day import CounterDay
+from app.models.request import Request
 from app.models.today_counter import TodayCounter
+from app.schemas.request import Status
 from app.schemas.today_counter import RequestCounter
 
+logger = logging.getLogger(__name__)
+
+
+def counter_day():
+    # The day tickets are numbered in, by the database clock
+    return cast(func.timezone(settings.COUNTER_TIMEZONE, func.now()), Date)
+
+
+def today() -> date:
+    return datetime.now(ZoneInfo(settings.COUNTER_TIMEZONE)).date()
+
+
 class CRUDTCounter(CRUDBase[TodayCounter, RequestCounter, None]):
-    pass
+    def allocate(self, count: int = 1):
+        # INSERT ... ON CONFLICT DO UPDATE ... RETURNING (day, last_number) reserving
+        # the next `count` numbers of today. Meant to run inside the request INSERT's
+        # transaction: the day's row stays locked until commit, so numbers have no gaps
+        table = CounterDay.__table__
+        stmt = insert(CounterDay).values(day=counter_day(), last_number=count)
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.day],
+            set_={"last_number": table.c.last_number + stmt.excluded.last_number},
+        ).returning(CounterDay.day, CounterDay.last_number)
+
+    async def get_last_completed(self, db: AsyncSession) -> Optional[TodayCounter]:
+        # Only today's tickets, a primary key range rather than the whole history
+        query = (
+            select(TodayCounter)
+            .join(Request, TodayCounter.request_id == Request.id)
+            .filter(TodayCounter.day == counter_day(), Request.status == Status.COMPLETED)
+            .order_by(Request.updated_at.desc())  # Order by updated_at field
+            .limit(1)
+        )
+        result = await db.execute(query)
+        return result.scalars().first()
+
+    async def load_now_serving(self, db: AsyncSession) -> None:
+        last_record = await self.get_last_completed(db)
+        if last_record:
+            now_serving.seed(last_record.request_id, last_record.id, day=today())
+        else:
+            now_serving.seed(None, None, day=today())
+
+    async def prune(self, db: AsyncSession, *, keep_days: int) -> int:
+        # Tickets (and their day rows) older than keep_days; the requests stay
+        cutoff = counter_day() - keep_days
+        result = await db.execute(delete(TodayCounter).where(TodayCounter.day < cutoff))
+        await db.execute(delete(CounterDay).where(CounterDay.day < cutoff))
+        await db.commit()
+        return result.rowcount
+
+    async def prune_periodically(
+        self, session_factory: Callable[[], AsyncSession], interval: float, keep_days: int
+    ) -> None:
+        while True:
+            try:
+                async with session_factory() as db:
+                    await self.prune(db, keep_days=keep_days)
+            except Exception:
+                logger.exception("Pruning old tickets failed")
+            await asyncio.sleep(interval)
 
 
-crud_todaycounter = CRUDTCounter(TodayCounter)
\ No newline at end of file
+crud_todaycounter = CRUDTCounter(TodayCounter)
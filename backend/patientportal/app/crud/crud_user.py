@@ -1,23 +1,65 @@
-from typing import Optional
+from typing import Any, Dict, Optional, Union
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.crud.base import CRUDBase
+from app.core.row_encoder import RowEncoder
 from app.models.user import User
 from app.schemas.user import UserCreate, GuestUserCreate
-from app.core.security import get_password_hash, verify_password
+from app.core.password_hasher import password_hasher
+from app.core.event_bus import event_bus
+from app.core.principal_cache import principal_cache
+from app.core.token_revocation import token_revocations
 
 class CRUDUser(CRUDBase[User, UserCreate, None]):
+    # Same layout as UserResponse
+    list_encoder = RowEncoder([
+        ("username", User.username),
+        ("role", User.role),
+        ("id", User.id),
+    ])
+    _guest: Optional[User] = None
+
     async def create(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
         db_obj = User(
             username=obj_in.username,
-            password=get_password_hash(obj_in.password),
+            password=await password_hasher.hash(obj_in.password),
             role=obj_in.role,
         )
         db.add(db_obj)
         await db.commit()
         await db.refresh(db_obj)
+        # Ids can be reused after the table is recreated, so never trust an old entry
+        await principal_cache.evict(db_obj.id)
         return db_obj
 
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: User,
+        obj_in: Union[Any, Dict[str, Any]]
+    ) -> Optional[User]:
+        previous_role = db_obj.role
+        user = await super().update(db, db_obj=db_obj, obj_in=obj_in, fast=True)
+        if user is None:
+            # Deleted in the meantime, remove() already dropped its cached state
+            return None
+        # Role (or any other) change must be visible on the next request, on every worker
+        await principal_cache.evict(user.id)
+        if user.role != previous_role:
+            await token_revocations.revoke(user.id)
+            await event_bus.publish("users.role_changed", {"user_id": user.id, "role": user.role})
+        return user
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[User]:
+        # The guest account is never deleted
+        user = await super().remove(db, id=id, where=[User.is_guest == False])
+        if user is not None:
+            await principal_cache.evict(id)
+            await token_revocations.revoke(id)
+            await event_bus.publish("users.deleted", {"user_id": id})
+        return user
+
     async def get_by_username(self, db: AsyncSession, *, username: str) -> Optional[User]:
         query = select(User).filter(User.username == username)
         result = await db.execute(query)
@@ -27,20 +69,32 @@ class CRUDUser(CRUDBase[User, UserCreate, None]):
         user = await self.get_by_username(db, username=username)
         if not user:
             return None
-        if not verify_password(password, user.password):
+        if not await password_hasher.verify(password, user.password):
             return None
         return user
     
+    async def get_guest(self, db: AsyncSession) -> Optional[User]:
+        # The guest account can't be deleted, so it is looked up once per process
+        if self._guest is None:
+            result = await db.execute(select(User).filter(User.is_guest == True))
+            guest = result.scalar_one_or_none()
+            if guest is not None:
+                db.expunge(guest)
+            self._guest = guest
+        return self._guest
+
     async def create_guest_user(self, db: AsyncSession, *, obj_in: GuestUserCreate) -> User:
         db_obj = User(
             username=obj_in.username,
             is_guest=True,
-            password=get_password_hash(obj_in.password),
+            password=await password_hasher.hash(obj_in.password),
             role=obj_in.role,
         )
         db.add(db_obj)
         await db.commit()
         await db.refresh(db_obj)
+        await principal_cache.evict(db_obj.id)
+        self._guest = None
         return db_obj
 
 crud_user = CRUDUser(User)
\ No newline at end of file
@@ -0,0 +1,116 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import ClauseElement, DateTime, and_, false, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import Executable
+
+# (column name, descending)
+OrderSpec = List[Tuple[str, bool]]
+
+
+def parse_order_by(model: Any, order_by: Optional[str]) -> OrderSpec:
+    # "-updated_at, -created_at" -> [("updated_at", True), ("created_at", True), ("id", True)]
+    columns = model.__table__.columns
+    spec: OrderSpec = []
+    for order in (order_by or "").split(","):
+        order = order.strip()
+        if not order:
+            continue
+        descending = order[0] == "-"
+        name = order[1:] if order[0] in "+-" else order
+        if name not in columns:
+            raise ValueError(f"Can't order by '{name}'")
+        spec.append((name, descending))
+
+    # Always finish on the primary key so the order (and therefore the cursor) is total
+    if not any(name == "id" for name, _ in spec):
+        spec.append(("id", spec[-1][1] if spec else False))
+    return spec
+
+
+def order_clauses(model: Any, spec: OrderSpec) -> list:
+    # Pin NULL placement so the keyset predicate below matches the sort exactly
+    clauses = []
+    for name, descending in spec:
+        column = getattr(model, name)
+        clauses.append(column.desc().nulls_first() if descending else column.asc().nulls_last())
+    return clauses
+
+
+def _spec_key(spec: OrderSpec) -> str:
+    return ",".join(("-" if descending else "+") + name for name, descending in spec)
+
+
+def encode_cursor(spec: OrderSpec, row: Any) -> str:
+    values = []
+    for name, _ in spec:
+        value = getattr(row, name)
+        values.append(value.isoformat() if isinstance(value, datetime) else value)
+    payload = json.dumps({"o": _spec_key(spec), "v": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(model: Any, spec: OrderSpec, cursor: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["o"] != _spec_key(spec) or len(payload["v"]) != len(spec):
+            raise ValueError
+        values = []
+        for (name, _), value in zip(spec, payload["v"]):
+            if value is not None and isinstance(model.__table__.columns[name].type, DateTime):
+                value = datetime.fromisoformat(value)
+            values.append(value)
+        return values
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise ValueError("Invalid cursor for this ordering")
+
+
+def keyset_filter(model: Any, spec: OrderSpec, values: list):
+    # Rows strictly after `values` in the order produced by order_clauses()
+    def equals(column, value):
+        return column.is_(None) if value is None else column == value
+
+    def after(column, descending, value, nullable):
+        if descending:
+            # NULLS FIRST: after a NULL come all non-NULL values
+            return column.is_not(None) if value is None else column < value
+        # NULLS LAST: nothing comes after a NULL
+        if value is None:
+            return false()
+        return or_(column > value, column.is_(None)) if nullable else column > value
+
+    branches = []
+    for i, (name, descending) in enumerate(spec):
+        prefix = [
+            equals(getattr(model, prev_name), prev_value)
+            for (prev_name, _), prev_value in zip(spec[:i], values[:i])
+        ]
+        nullable = model.__table__.columns[name].nullable
+        branches.append(and_(*prefix, after(getattr(model, name), descending, values[i], nullable)))
+    return or_(*branches)
+
+
+class _Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+async def estimate_row_count(db: AsyncSession, query) -> int:
+    # Planner estimate for the number of rows `query` returns; no rows are scanned
+    result = await db.execute(_Explain(query))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
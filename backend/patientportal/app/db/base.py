@@ -1,4 +1,9 @@
 from app.db.base_class import Base
 from app.models.user import User
 from app.models.request import Request
-from app.models.assignee import Assignee
\ No newline at end of file
+from app.models.assignee import Assignee
+from app.models.today_counter import TodayCounter
+from app.models.counter_day import CounterDay
+from app.models.request_daily_stats import RequestDailyStats
+from app.models.request_hourly_stats import RequestHourlyStats
+from app.models.request_turnaround_sketch import RequestTurnaroundSketch
\ No newline at end of file
@@ -0,0 +1,28 @@
+from pathlib import Path
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+def get_head_revision() -> str:
+    return ScriptDirectory.from_config(Config(str(ALEMBIC_INI))).get_current_head()
+
+
+async def get_current_revision(engine: AsyncEngine) -> str:
+    async with engine.connect() as conn:
+        return await conn.run_sync(
+            lambda sync_conn: MigrationContext.configure(sync_conn).get_current_revision()
+        )
+
+
+async def check_migration_head(engine: AsyncEngine) -> None:
+    # Only reads alembic_version; the schema itself is owned by the migrations
+    current = await get_current_revision(engine)
+    head = get_head_revision()
+    if current != head:
+        raise RuntimeError(
+            f"Database is at migration {current}, expected {head}. Run `alembic upgrade head`."
+        )
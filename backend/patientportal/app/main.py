@@ -1,34 +1,57 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from app.core.config import settings
 from app.api.v1.router import api_router
-from app.db.base import Base
+from app.db.migrations import check_migration_head
 from app.db.init_db import init_guest_user, init_admin_user
 from app.db.session import engine
 from contextlib import asynccontextmanager
 from app.db.session import AsyncSessionLocal
 from app.core.exceptions import (
     global_exception_handler,
-    validation_exception_handler
+    validation_exception_handler,
+    hashing_overloaded_exception_handler
 )
+from app.core.password_hasher import password_hasher, HashingOverloadedError
+from app.crud import crud_request_turnaround, crud_todaycounter
+from app.core.event_bus import event_bus
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Broadcasts reach the sockets of the other workers from here on
+    await event_bus.start()
+
     if not settings.TESTING:
-        async with engine.begin() as conn:
-            # Create all tables if not exists
-            await conn.run_sync(Base.metadata.create_all)
+        # The schema is managed by Alembic, we only make sure it is up to date
+        await check_migration_head(engine)
 
         # Initialize application data
         async with AsyncSessionLocal() as db:
             await init_guest_user(db)
             await init_admin_user(db)
+            # GET /counter/last is served from memory from here on
+            await crud_todaycounter.load_now_serving(db)
+
+    turnaround_flusher = asyncio.create_task(
+        crud_request_turnaround.flush_periodically(AsyncSessionLocal, settings.TURNAROUND_FLUSH_SECONDS)
+    )
+    counter_pruner = asyncio.create_task(
+        crud_todaycounter.prune_periodically(AsyncSessionLocal, 3600, settings.COUNTER_RETENTION_DAYS)
+    )
 
     # Yield control to the application
     yield
 
+    turnaround_flusher.cancel()
+    counter_pruner.cancel()
+    await event_bus.stop()
+    async with AsyncSessionLocal() as db:
+        await crud_request_turnaround.flush(db)
+    password_hasher.shutdown()
+
 
 def create_application() -> FastAPI:
     app = FastAPI(
@@ -55,6 +78,7 @@ def create_application() -> FastAPI:
     app.include_router(api_router, prefix=settings.API_V1_STR)
     app.add_exception_handler(Exception, global_exception_handler)
     app.add_exception_handler(RequestValidationError, validation_exception_handler)
+    app.add_exception_handler(HashingOverloadedError, hashing_overloaded_exception_handler)
     
     return app
 
@@ -7,4 +7,7 @@ class Assignee(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     full_name = Column(String(100), nullable=False)
-    assigned_requests = relationship("Request", back_populates="assignee", foreign_keys="[Request.assigned_to]")
+    # The database clears requests.assigned_to (ON DELETE SET NULL), never load them to delete
+    assigned_requests = relationship(
+        "Request", back_populates="assignee", foreign_keys="[Request.assigned_to]", passive_deletes=True
+    )
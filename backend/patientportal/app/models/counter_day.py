@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Date, Integer
+from app.db.base_class import Base
+
+class CounterDay(Base):
+    # Last ticket number handed out per day (COUNTER_TIMEZONE)
+    __tablename__ = "counter_days"
+
+    day = Column(Date, primary_key=True)
+    last_number = Column(Integer, nullable=False)
@@ -1,19 +1,23 @@
-from sqlalchemy import Column, Integer,BigInteger, String, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer,BigInteger, String, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 from app.schemas.request import Status
 class Request(Base):
     __tablename__ = "requests"
+    # Keep in sync with migrations/versions (the indexes are built there concurrently)
+    __table_args__ = (
+        Index("ix_requests_status_updated_at", "status", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     full_name = Column(String(100), nullable=False)
-    national_id = Column(BigInteger, nullable=False)
+    national_id = Column(BigInteger, nullable=False, index=True)
     medical_number = Column(BigInteger, nullable=True)
     notes = Column(String(255), nullable=True)
     status = Column(String(20), nullable=True, default=Status.PENDING)
-    created_by = Column(Integer, ForeignKey("users.id"))
-    assigned_to = Column(Integer, ForeignKey("assignees.id"), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), index=True)
+    assigned_to = Column(Integer, ForeignKey("assignees.id", ondelete="SET NULL"), nullable=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     creator = relationship("User", back_populates="requests", foreign_keys=[created_by], lazy="joined")
@@ -24,6 +28,8 @@ class Request(Base):
         "TodayCounter",
         back_populates="full_request",
         cascade="all, delete-orphan",
+        # The database removes the counter (ON DELETE CASCADE), don't load it to delete it
+        passive_deletes=True,
         foreign_keys="[TodayCounter.request_id]",
         lazy="joined",
         uselist=False  
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Date, Integer
+from app.db.base_class import Base
+
+class RequestDailyStats(Base):
+    # Request counts per UTC creation day, kept in step by every request write
+    __tablename__ = "request_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    total = Column(Integer, nullable=False, default=0, server_default="0")
+    completed = Column(Integer, nullable=False, default=0, server_default="0")
+    pending = Column(Integer, nullable=False, default=0, server_default="0")
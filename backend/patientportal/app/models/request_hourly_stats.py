@@ -0,0 +1,13 @@
+from sqlalchemy import Column, DateTime, Float, Integer
+from app.db.base_class import Base
+
+class RequestHourlyStats(Base):
+    # Requests created and completed per UTC hour. Rows only ever grow while their
+    # hour is current, so past hours never change
+    __tablename__ = "request_hourly_stats"
+
+    hour = Column(DateTime(timezone=True), primary_key=True)
+    created = Column(Integer, nullable=False, default=0, server_default="0")
+    completed = Column(Integer, nullable=False, default=0, server_default="0")
+    # Sum of (completed at - created at) over the hour's completions
+    turnaround_seconds = Column(Float, nullable=False, default=0, server_default="0")
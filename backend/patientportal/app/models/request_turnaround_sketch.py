@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Date, Integer
+from app.db.base_class import Base
+
+class RequestTurnaroundSketch(Base):
+    # Per UTC completion day quantile sketch of request turnaround (completed at -
+    # created at), one row per non-empty bucket of app.core.quantile_sketch
+    __tablename__ = "request_turnaround_sketch"
+
+    day = Column(Date, primary_key=True)
+    bucket = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0, server_default="0")
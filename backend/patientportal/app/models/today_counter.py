@@ -1,10 +1,12 @@
-from sqlalchemy import Column, Integer,ForeignKey
+from sqlalchemy import Column, Date, Integer,ForeignKey
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 class TodayCounter(Base):
     __tablename__ = "today_counter"
 
-    id = Column(Integer, primary_key=True, index=True)
-    request_id = Column(Integer,ForeignKey("requests.id"), nullable=False)
+    # id is the ticket number, it starts over at 1 every day
+    day = Column(Date, primary_key=True)
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    request_id = Column(Integer,ForeignKey("requests.id", ondelete="CASCADE"), nullable=False, index=True)
 
-    full_request = relationship("Request", back_populates="counter", foreign_keys=[request_id])
\ No newline at end of file
+    full_request = relationship("Request", back_populates="counter", foreign_keys=[request_id])
@@ -11,4 +11,7 @@ class User(Base):
     password = Column(String(255), nullable=False)
     role = Column(String(20), nullable=False,  default=Role.INSERTER)
     is_guest = Column(Boolean, default=False, nullable=False)
-    requests = relationship("Request", back_populates="creator", foreign_keys="[Request.created_by]")
\ No newline at end of file
+    # The database clears requests.created_by (ON DELETE SET NULL), never load them to delete
+    requests = relationship(
+        "Request", back_populates="creator", foreign_keys="[Request.created_by]", passive_deletes=True
+    )
\ No newline at end of file
@@ -17,7 +17,9 @@ class AssigneeResponse(AssigneeBase):
         from_attributes = True
 
 class AssigneeListResponse(BaseModel):
-    remaining: int
+    # None when the caller opted out of counting
+    remaining: Optional[int]
+    next_cursor: Optional[str] = None
     results: List[AssigneeResponse]
     class Config:
         from_attributes = True
@@ -18,11 +18,17 @@ class RequestCreate(RequestBase):
     is_guest: Optional[bool] = False
     notes: Optional[str] = None
 
+class RequestBulkCreate(BaseModel):
+    requests: List[RequestCreate]
+
 class RequestUpdate(BaseModel):
     medical_number: Optional[int] = None
     notes: Optional[str] = None
     assigned_to: int
 
+class RequestBulkUpdate(RequestUpdate):
+    ids: List[int]
+
 class RequestResponse(RequestBase):
     id: int
     assignee: Optional[AssigneeResponse]
@@ -36,6 +42,23 @@ class RequestResponse(RequestBase):
     class Config:
         from_attributes = True
 
+class RequestBulkResponse(BaseModel):
+    results: List[RequestResponse]
+
+class RequestBulkUpdateItem(RequestBase):
+    id: int
+    assigned_to: Optional[int]
+    created_at: datetime
+    updated_at: Optional[datetime]
+    notes: Optional[str]
+    status: Status
+    counter: Optional[ResponseCounterForRequests]
+
+class RequestBulkUpdateResponse(BaseModel):
+    results: List[RequestBulkUpdateItem]
+    # Ids that don't exist or that the caller isn't allowed to edit
+    skipped: List[int]
+
 class RequestStats(BaseModel):
     total: int
     completed: int
@@ -45,6 +68,30 @@ class RequestStats(BaseModel):
     class Config:
         from_attributes = True
 
+class RequestTimeseriesBucket(BaseModel):
+    start: datetime
+    created: int
+    completed: int
+    # None when nothing was completed in the bucket
+    mean_turnaround_seconds: Optional[float]
+
+class RequestTimeseries(BaseModel):
+    granularity: str
+    results: List[RequestTimeseriesBucket]
+
+class TurnaroundQuantiles(BaseModel):
+    count: int
+    # Seconds from creation to completion, None without completions
+    p50: Optional[float]
+    p90: Optional[float]
+    p99: Optional[float]
+
+class RequestTurnaroundStats(BaseModel):
+    today: TurnaroundQuantiles
+    last_7_days: TurnaroundQuantiles
+
 class RequestListResponse(BaseModel):
-    remaining: int
+    # None when the caller opted out of counting
+    remaining: Optional[int]
+    next_cursor: Optional[str] = None
     results: List[RequestResponse]
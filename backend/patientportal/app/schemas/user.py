@@ -24,5 +24,7 @@ class UserResponse(UserBase):
         from_attributes = True
 
 class UserListResponse(BaseModel):
-    remaining: int
+    # None when the caller opted out of counting
+    remaining: Optional[int]
+    next_cursor: Optional[str] = None
     results: List[UserResponse]
\ No newline at end of file
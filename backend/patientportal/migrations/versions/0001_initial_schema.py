@@ -0,0 +1,83 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+Databases created by the old `Base.metadata.create_all` startup already have
+these tables, so each one is only created when it is missing.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("username", sa.String(length=50), nullable=False),
+            sa.Column("password", sa.String(length=255), nullable=False),
+            sa.Column("role", sa.String(length=20), nullable=False),
+            sa.Column("is_guest", sa.Boolean(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    if "assignees" not in existing:
+        op.create_table(
+            "assignees",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("full_name", sa.String(length=100), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_assignees_id", "assignees", ["id"])
+
+    if "requests" not in existing:
+        op.create_table(
+            "requests",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("full_name", sa.String(length=100), nullable=False),
+            sa.Column("national_id", sa.BigInteger(), nullable=False),
+            sa.Column("medical_number", sa.BigInteger(), nullable=True),
+            sa.Column("notes", sa.String(length=255), nullable=True),
+            sa.Column("status", sa.String(length=20), nullable=True),
+            sa.Column("created_by", sa.Integer(), nullable=True),
+            sa.Column("assigned_to", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(["assigned_to"], ["assignees.id"]),
+            sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_requests_id", "requests", ["id"])
+
+    if "today_counter" not in existing:
+        op.create_table(
+            "today_counter",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("request_id", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["request_id"], ["requests.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_today_counter_id", "today_counter", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("today_counter")
+    op.drop_table("requests")
+    op.drop_table("assignees")
+    op.drop_table("users")
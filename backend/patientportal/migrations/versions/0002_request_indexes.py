@@ -0,0 +1,50 @@
+"""request query indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+
+Indexes are built with CREATE INDEX CONCURRENTLY so writes to `requests`
+are not blocked while they build. CONCURRENTLY can't run inside a
+transaction, hence the autocommit block.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    # Stats and date range filters
+    ("ix_requests_created_at", "requests", ["created_at"]),
+    # Status filter on the list endpoint and the last completed counter
+    ("ix_requests_status_updated_at", "requests", ["status", "updated_at"]),
+    # Foreign key lookups
+    ("ix_requests_assigned_to", "requests", ["assigned_to"]),
+    ("ix_requests_created_by", "requests", ["created_by"]),
+    ("ix_today_counter_request_id", "today_counter", ["request_id"]),
+    ("ix_requests_national_id", "requests", ["national_id"]),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table, postgresql_concurrently=True, if_exists=True
+            )
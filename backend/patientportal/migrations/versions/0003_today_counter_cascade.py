@@ -0,0 +1,35 @@
+"""cascade today_counter deletes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00
+
+Deleting a request removes its counter row in the database, so a delete
+is a single DELETE ... RETURNING without loading the counter first.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_constraint("today_counter_request_id_fkey", "today_counter", type_="foreignkey")
+    op.create_foreign_key(
+        "today_counter_request_id_fkey", "today_counter", "requests",
+        ["request_id"], ["id"], ondelete="CASCADE",
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("today_counter_request_id_fkey", "today_counter", type_="foreignkey")
+    op.create_foreign_key(
+        "today_counter_request_id_fkey", "today_counter", "requests", ["request_id"], ["id"]
+    )
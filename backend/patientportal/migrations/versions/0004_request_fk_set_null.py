@@ -0,0 +1,38 @@
+"""set null on requests when their assignee or creator is deleted
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:00
+
+Deleting an assignee or a user keeps their requests and clears the
+reference in the database, in the same statement as the DELETE.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+FOREIGN_KEYS = [
+    ("requests_assigned_to_fkey", "assignees", "assigned_to"),
+    ("requests_created_by_fkey", "users", "created_by"),
+]
+
+
+def upgrade() -> None:
+    for name, referent, column in FOREIGN_KEYS:
+        op.drop_constraint(name, "requests", type_="foreignkey")
+        op.create_foreign_key(name, "requests", referent, [column], ["id"], ondelete="SET NULL")
+
+
+def downgrade() -> None:
+    for name, referent, column in FOREIGN_KEYS:
+        op.drop_constraint(name, "requests", type_="foreignkey")
+        op.create_foreign_key(name, "requests", referent, [column], ["id"])
@@ -0,0 +1,48 @@
+"""per-day request stats rollups
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00
+
+GET /requests/stats reads these rollups instead of scanning every request
+of the year. They are backfilled here from the existing requests; from
+then on every request write updates them in its own transaction.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "request_daily_stats",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("total", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("completed", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("pending", sa.Integer(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("day"),
+    )
+    op.execute(
+        """
+        INSERT INTO request_daily_stats (day, total, completed, pending)
+        SELECT (created_at AT TIME ZONE 'UTC')::date,
+               count(*),
+               count(*) FILTER (WHERE status = 'completed'),
+               count(*) FILTER (WHERE status = 'pending')
+        FROM requests
+        GROUP BY 1
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("request_daily_stats")
@@ -0,0 +1,54 @@
+"""hourly request created/completed rollups
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:00
+
+Backs GET /requests/stats/timeseries. Backfilled from the existing
+requests: creations by created_at, completions by updated_at (the time
+a request was completed).
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "request_hourly_stats",
+        sa.Column("hour", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("completed", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("turnaround_seconds", sa.Float(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("hour"),
+    )
+    op.execute(
+        """
+        INSERT INTO request_hourly_stats (hour, created, completed, turnaround_seconds)
+        SELECT hour, sum(created), sum(completed), sum(turnaround_seconds)
+        FROM (
+            SELECT date_trunc('hour', created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS hour,
+                   1 AS created, 0 AS completed, 0 AS turnaround_seconds
+            FROM requests
+            UNION ALL
+            SELECT date_trunc('hour', updated_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+                   0, 1, extract(epoch FROM updated_at - created_at)
+            FROM requests
+            WHERE status = 'completed' AND updated_at IS NOT NULL
+        ) AS events
+        GROUP BY hour
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("request_hourly_stats")
@@ -0,0 +1,53 @@
+"""per-day request turnaround quantile sketches
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 00:00:00
+
+Backs GET /requests/stats/turnaround. Backfilled from the completed
+requests, with the bucket keys of app.core.quantile_sketch at 1% accuracy
+(gamma = 1.01 / 0.99, everything up to a second in bucket 0).
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "request_turnaround_sketch",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("bucket", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("day", "bucket"),
+    )
+    op.execute(
+        """
+        INSERT INTO request_turnaround_sketch (day, bucket, count)
+        SELECT day, bucket, count(*)
+        FROM (
+            SELECT (updated_at AT TIME ZONE 'UTC')::date AS day,
+                   CASE WHEN seconds <= 1 THEN 0
+                        ELSE ceil(ln(seconds) / ln(1.01 / 0.99))::integer END AS bucket
+            FROM (
+                SELECT updated_at, extract(epoch FROM updated_at - created_at)::float8 AS seconds
+                FROM requests
+                WHERE status = 'completed' AND updated_at IS NOT NULL
+            ) AS completed
+        ) AS keyed
+        GROUP BY day, bucket
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("request_turnaround_sketch")
@@ -0,0 +1,72 @@
+"""per-day ticket numbers
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 00:00:00
+
+Ticket numbers (today_counter.id) start over every day. They are handed
+out from counter_days inside the request INSERT instead of a global
+sequence, and today_counter is keyed by (day, id) so old days can be
+pruned by primary key range. Existing tickets keep their numbers and
+today's numbering carries on from the highest one.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, Sequence[str], None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "counter_days",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("last_number", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("day"),
+    )
+
+    op.add_column("today_counter", sa.Column("day", sa.Date(), nullable=True))
+    op.execute(
+        sa.text(
+            "UPDATE today_counter SET day = (requests.created_at AT TIME ZONE :tz)::date "
+            "FROM requests WHERE requests.id = today_counter.request_id"
+        ).bindparams(tz=settings.COUNTER_TIMEZONE)
+    )
+    op.alter_column("today_counter", "day", nullable=False)
+
+    op.drop_index("ix_today_counter_id", table_name="today_counter")
+    op.drop_constraint("today_counter_pkey", "today_counter", type_="primary")
+    op.alter_column("today_counter", "id", server_default=None)
+    op.execute("DROP SEQUENCE IF EXISTS today_counter_id_seq")
+    op.create_primary_key("today_counter_pkey", "today_counter", ["day", "id"])
+
+    op.execute(
+        "INSERT INTO counter_days (day, last_number) "
+        "SELECT day, max(id) FROM today_counter GROUP BY day"
+    )
+
+
+def downgrade() -> None:
+    # Back to one global sequence: tickets are renumbered in (day, number) order
+    op.drop_constraint("today_counter_pkey", "today_counter", type_="primary")
+    op.execute(
+        "UPDATE today_counter SET id = numbered.n "
+        "FROM (SELECT day, id, row_number() OVER (ORDER BY day, id) AS n FROM today_counter) AS numbered "
+        "WHERE today_counter.day = numbered.day AND today_counter.id = numbered.id"
+    )
+    op.execute("CREATE SEQUENCE today_counter_id_seq OWNED BY today_counter.id")
+    op.execute("SELECT setval('today_counter_id_seq', coalesce(max(id), 0) + 1, false) FROM today_counter")
+    op.alter_column("today_counter", "id", server_default=sa.text("nextval('today_counter_id_seq')"))
+    op.create_primary_key("today_counter_pkey", "today_counter", ["id"])
+    op.create_index("ix_today_counter_id", "today_counter", ["id"])
+    op.drop_column("today_counter", "day")
+    op.drop_table("counter_days")
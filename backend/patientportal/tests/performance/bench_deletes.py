@@ -0,0 +1,108 @@
+import argparse
+import asyncio
+import logging
+import time
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.crud import crud_assignee, crud_user
+from app.db.base import Base
+from app.models.assignee import Assignee
+from app.models.request import Request
+from app.models.user import User
+
+# Deleting an assignee or user must not touch their requests row by row.
+# Seeds one assignee and one user owning --requests requests each, times both
+# deletes and checks the requests survived with the reference cleared.
+#
+#   python bench_deletes.py --database-url postgresql+asyncpg://.../scratch_db
+#
+# Use a scratch database: the tables are created if missing and the seeded rows
+# are removed at the end.
+
+
+def setup_logging():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+async def seed(db: AsyncSession, count: int) -> tuple:
+    assignee = Assignee(full_name="Benchmark Assignee")
+    user = User(username=f"benchmark_{int(time.time())}", password="-", role="inserter")
+    db.add_all([assignee, user])
+    await db.flush()
+
+    # Generated server side, seeding 100k rows is a single statement
+    await db.execute(
+        text(
+            "INSERT INTO requests (full_name, national_id, status, created_by, assigned_to, created_at) "
+            "SELECT 'Benchmark ' || n, n, 'completed', :user_id, :assignee_id, now() "
+            "FROM generate_series(1, :count) AS n"
+        ),
+        {"user_id": user.id, "assignee_id": assignee.id, "count": count},
+    )
+    await db.commit()
+    return assignee.id, user.id
+
+
+async def timed(label: str, coroutine) -> float:
+    started = time.perf_counter()
+    result = await coroutine
+    elapsed = time.perf_counter() - started
+    if result is None:
+        raise RuntimeError(f"{label}: nothing was deleted")
+    logging.info(f"{label}: {elapsed * 1000:.1f}ms")
+    return elapsed
+
+
+async def run(database_url: str, count: int, max_seconds: float) -> bool:
+    engine = create_async_engine(database_url, connect_args={"ssl": False})
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    passed = True
+    async with session_factory() as db:
+        logging.info(f"Seeding {count} requests")
+        assignee_id, user_id = await seed(db, count)
+
+        timings = {
+            "delete assignee": await timed("delete assignee", crud_assignee.remove(db, id=assignee_id)),
+            "delete user": await timed("delete user", crud_user.remove(db, id=user_id)),
+        }
+
+        seeded = Request.full_name.like("Benchmark %")
+        result = await db.execute(
+            select(func.count(), func.count(Request.assigned_to), func.count(Request.created_by))
+            .where(seeded)
+        )
+        total, assigned, created = result.one()
+        if total != count or assigned or created:
+            logging.error(f"Expected {count} detached requests, found {total} ({assigned} assigned, {created} with creator)")
+            passed = False
+        for label, elapsed in timings.items():
+            if elapsed > max_seconds:
+                logging.warning(f"{label} took {elapsed:.2f}s, over the {max_seconds}s budget")
+                passed = False
+
+        await db.execute(Request.__table__.delete().where(seeded))
+        await db.commit()
+
+    await engine.dispose()
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark deleting assignees and users with many requests")
+    parser.add_argument("--database-url", default=str(settings.DATABASE_URL), help="Scratch database URL")
+    parser.add_argument("--requests", type=int, default=100_000, help="Requests owned by each deleted row")
+    parser.add_argument("--max-seconds", type=float, default=5.0, help="Budget for each delete")
+    args = parser.parse_args()
+
+    setup_logging()
+    if not asyncio.run(run(args.database_url, args.requests, args.max_seconds)):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,7 @@ from app.core.config import settings, get_settings
 from app.core.config import Settings
 from datetime import datetime, timedelta, timezone
 from app.core.security import create_access_token
+from app.core.now_serving import now_serving
 import pytest
 import pytest_asyncio
 from typing import AsyncGenerator, AsyncIterator
@@ -54,6 +55,9 @@ async def db():
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
 
+    # Process level state about the tables that were just dropped
+    now_serving.reset()
+
     async with AsyncTestingSessionLocal() as session:
         yield session
 
@@ -87,4 +87,20 @@ async def test_delete_assignee(client, admin_token):
         f"/api/v1/assignees/{assignee_id}",
         headers=headers
     )
-    assert get_response.status_code == 404
\ No newline at end of file
+    assert get_response.status_code == 404
+@pytest.mark.asyncio
+async def test_delete_assignee_keeps_requests(client, admin_token, assignee_id):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await client.post(
+        "/api/v1/requests/", json={"full_name": "Test User", "national_id": 123456789}, headers=headers
+    )
+    request_id = response.json()["id"]
+    await client.put(f"/api/v1/requests/{request_id}", json={"assigned_to": assignee_id}, headers=headers)
+
+    response = await client.delete(f"/api/v1/assignees/{assignee_id}", headers=headers)
+    assert response.status_code == 200
+
+    # ON DELETE SET NULL, the request stays and is just unassigned
+    response = await client.get(f"/api/v1/requests/{request_id}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["assignee"] is None
@@ -92,4 +92,24 @@ async def test_assignee_pagination_over_limit(client, admin_token, db):
 
 
 
-    
\ No newline at end of file
+    
+@pytest.mark.asyncio
+async def test_assignee_cursor_pagination(client, admin_token, db):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    for i in range(7):
+        await client.post("/api/v1/assignees/", json={"full_name": f"Assignee {i}"}, headers=headers)
+
+    names = []
+    response = await client.get("/api/v1/assignees/?limit=3", headers=headers)
+    data = response.json()
+    names.extend(a["full_name"] for a in data["results"])
+    assert data["remaining"] == 4
+    while data["next_cursor"]:
+        response = await client.get(
+            f"/api/v1/assignees/?limit=3&cursor={data['next_cursor']}", headers=headers
+        )
+        data = response.json()
+        names.extend(a["full_name"] for a in data["results"])
+
+    assert names == [f"Assignee {i}" for i in range(7)]
@@ -42,4 +42,16 @@ async def test_login_missing_token_prefix(client):
 @pytest.mark.asyncio
 async def test_login_missing_authorization_header(client):
     response = await client.get("/api/v1/requests/")
-    assert response.status_code == 401
\ No newline at end of file
+    assert response.status_code == 401
+@pytest.mark.asyncio
+async def test_login_rejected_when_hashing_saturated(client, admin_token, monkeypatch):
+    from app.core.password_hasher import password_hasher
+
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+    response = await client.post(
+        "/api/v1/auth/login",
+        data={"username": "admin", "password": "adminpass"}
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert password_hasher.stats()["rejected"] >= 1
@@ -1,4 +1,5 @@
 import pytest
+from sqlalchemy import event
 from app.schemas.request import Status
 
 
@@ -124,4 +125,71 @@ async def test_request_lifecycle_for_last_counter(client, admin_token, verifier_
 @pytest.mark.asyncio
 async def test_no_request_for_last_counter(client):
     response = await client.get("/api/v1/counter/last")
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_last_counter_served_from_memory(client, admin_token, assignee_id, db):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    ids = []
+    for i in range(3):
+        response = await client.post(
+            "/api/v1/requests/", json={"full_name": f"User {i}", "national_id": 1000000 + i}, headers=headers
+        )
+        ids.append(response.json()["id"])
+    await client.put(f"/api/v1/requests/{ids[1]}", json={"assigned_to": assignee_id}, headers=headers)
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        response = await client.get("/api/v1/counter/last")
+        etag = response.headers["ETag"]
+        assert response.headers["Cache-Control"] == "no-cache"
+        assert response.json() == {"request_id": ids[1], "last_counter": 2}
+        response = await client.get("/api/v1/counter/last", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert statements == []
+
+    # Bulk completions show the last ticket of the batch
+    await client.put("/api/v1/requests/bulk", json={"ids": [ids[2], ids[0]], "assigned_to": assignee_id}, headers=headers)
+    response = await client.get("/api/v1/counter/last", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json() == {"request_id": ids[0], "last_counter": 1}
+
+    # Deleting the request on display falls back to the latest remaining completion
+    await client.delete(f"/api/v1/requests/{ids[0]}", headers=headers)
+    response = await client.get("/api/v1/counter/last")
+    assert response.json()["request_id"] in (ids[1], ids[2])
+
+@pytest.mark.asyncio
+async def test_now_serving_ignores_earlier_days(client, admin_token, assignee_id, db):
+    from sqlalchemy import update
+    from app.models.today_counter import TodayCounter
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    ids = []
+    for i in range(2):
+        response = await client.post(
+            "/api/v1/requests/", json={"full_name": f"User {i}", "national_id": 1000000 + i}, headers=headers
+        )
+        ids.append(response.json()["id"])
+    # The first request got yesterday's ticket 57, numbers restart every day
+    await db.execute(
+        update(TodayCounter).where(TodayCounter.request_id == ids[0]).values(day=TodayCounter.day - 1, id=57)
+    )
+    await db.commit()
+
+    await client.put(f"/api/v1/requests/{ids[1]}", json={"assigned_to": assignee_id}, headers=headers)
+    await client.put(f"/api/v1/requests/{ids[0]}", json={"assigned_to": assignee_id}, headers=headers)
+    response = await client.get("/api/v1/counter/last")
+    assert response.json() == {"request_id": ids[1], "last_counter": 2}
+
+    await client.put("/api/v1/requests/bulk", json={"ids": [ids[1], ids[0]], "assigned_to": assignee_id}, headers=headers)
+    response = await client.get("/api/v1/counter/last")
+    assert response.json() == {"request_id": ids[1], "last_counter": 2}
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import pytest
+from app.api.v1.endpoints.websocket_counter_manager import counter_websocket_manager
+from app.core.config import settings
+from app.core.event_bus import (
+    PostgresEventBus, UnixSocketBroker, UnixSocketEventBus, event_bus, postgres_connect_args
+)
+
+
+async def wait_for(condition):
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("Event not delivered")
+
+
+def collect(bus, topic):
+    events = []
+
+    async def handler(payload):
+        events.append(payload)
+
+    bus.subscribe(topic, handler)
+    return events
+
+@pytest.mark.asyncio
+async def test_unix_socket_bus(tmp_path):
+    broker = UnixSocketBroker(str(tmp_path / "events.sock"))
+    await broker.start()
+    first, second = UnixSocketEventBus(broker.path), UnixSocketEventBus(broker.path)
+    await first.start()
+    await second.start()
+    try:
+        first_events, second_events = collect(first, "ws.counter"), collect(second, "ws.counter")
+        await first.publish("ws.counter", {"type": "counter_update", "last_counter": 7})
+        await wait_for(lambda: second_events)
+        assert second_events == [{"type": "counter_update", "last_counter": 7}]
+
+        # The publisher ran its handlers once, its own echo is skipped
+        await second.publish("ws.counter", {"type": "counter_update", "last_counter": 8})
+        await wait_for(lambda: len(first_events) == 2)
+        await asyncio.sleep(0.05)
+        assert [e["last_counter"] for e in first_events] == [7, 8]
+        assert [e["last_counter"] for e in second_events] == [7, 8]
+    finally:
+        await first.stop()
+        await second.stop()
+        await broker.stop()
+
+@pytest.mark.asyncio
+async def test_postgres_bus():
+    connect_args = postgres_connect_args(str(settings.DATABASE_URL))
+    first = PostgresEventBus(connect_args, "test_events")
+    second = PostgresEventBus(connect_args, "test_events")
+    await first.start()
+    await second.start()
+    try:
+        events = collect(second, "ws.roles")
+        # Far over the 8000 byte NOTIFY limit, sent in chunks
+        message = {"type": "bulk", "data": [{"id": i, "full_name": "Ünïcode " * 10} for i in range(200)]}
+        await first.publish("ws.roles", {"roles": ["admin"], "message": message})
+        await wait_for(lambda: events)
+        assert events[0]["message"] == message
+        assert first.stats()["forwarded"] == 1 and second.stats()["received"] == 1
+    finally:
+        await first.stop()
+        await second.stop()
+
+@pytest.mark.asyncio
+async def test_postgres_bus_publish_only_queues():
+    connect_args = postgres_connect_args(str(settings.DATABASE_URL))
+    first = PostgresEventBus(connect_args, "test_events")
+    second = PostgresEventBus(connect_args, "test_events")
+    await second.start()
+    try:
+        events = collect(second, "ws.counter")
+        # No connection yet: publishing returns right away, the sender task sends it later
+        await asyncio.wait_for(first.publish("ws.counter", {"last_counter": 1}), timeout=0.1)
+        assert first.stats()["outbox"] == 1
+        await first.start()
+        await wait_for(lambda: events)
+        assert events == [{"last_counter": 1}]
+        assert first.stats()["outbox"] == 0
+    finally:
+        await first.stop()
+        await second.stop()
+
+@pytest.mark.asyncio
+async def test_events_from_other_processes_reach_local_sockets():
+    class Display:
+        def __init__(self):
+            self.sent = []
+
+        async def accept(self):
+            pass
+
+        async def send_text(self, frame):
+            self.sent.append(json.loads(frame))
+
+    display = Display()
+    await counter_websocket_manager.connect(display)
+    try:
+        remote = {"o": "another-worker", "t": "ws.counter", "p": {"type": "counter_update", "last_counter": 3}}
+        await event_bus._receive(json.dumps(remote))
+        await wait_for(lambda: display.sent)
+        assert display.sent == [{"type": "counter_update", "last_counter": 3}]
+    finally:
+        await counter_websocket_manager.disconnect(display)
+
+@pytest.mark.asyncio
+async def test_user_revocations_reach_other_workers(tmp_path):
+    from app.core.principal_cache import PrincipalCache
+    from app.core.token_revocation import TokenRevocationTable
+
+    broker = UnixSocketBroker(str(tmp_path / "events.sock"))
+    await broker.start()
+    first, second = UnixSocketEventBus(broker.path), UnixSocketEventBus(broker.path)
+    await first.start()
+    await second.start()
+    try:
+        # Two workers, each with its own revocation table and principal cache
+        tables = TokenRevocationTable(first), TokenRevocationTable(second)
+        caches = PrincipalCache(10, 60, first), PrincipalCache(10, 60, second)
+        for cache in caches:
+            cache.set(7, "user")
+
+        version = await tables[0].revoke(7)
+        await wait_for(lambda: tables[1].version(7) == version)
+        assert tables[0].version(7) == version > 0
+
+        await caches[0].evict(7)
+        await wait_for(lambda: caches[1].get(7) is None)
+        assert caches[0].get(7) is None
+    finally:
+        await first.stop()
+        await second.stop()
+        await broker.stop()
+
+@pytest.mark.asyncio
+async def test_result_cache_evictions_reach_other_workers(tmp_path):
+    from app.core.result_cache import ResultCache
+
+    broker = UnixSocketBroker(str(tmp_path / "events.sock"))
+    await broker.start()
+    first, second = UnixSocketEventBus(broker.path), UnixSocketEventBus(broker.path)
+    await first.start()
+    await second.start()
+    try:
+        caches = ResultCache(60, 10, first, "stats.changed"), ResultCache(60, 10, second, "stats.changed")
+        for cache in caches:
+            cache.set("leaderboard", [1, 2], cache.generation)
+
+        await caches[0].evict()
+        await wait_for(lambda: caches[1].get("leaderboard") is None)
+        assert caches[0].get("leaderboard") is None
+        # A result computed before the eviction isn't stored afterwards
+        caches[1].set("leaderboard", [1, 2], 0)
+        assert caches[1].get("leaderboard") is None
+    finally:
+        await first.stop()
+        await second.stop()
+        await broker.stop()
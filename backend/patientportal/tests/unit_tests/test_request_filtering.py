@@ -1,6 +1,7 @@
 import pytest
 from datetime import datetime
-from app.schemas.request import Status
+from app.crud import crud_request
+from app.schemas.request import RequestListResponse, Status
 from httpx import AsyncClient
 
 @pytest.mark.asyncio
@@ -39,4 +40,101 @@ async def test_request_complex_filtering(client, admin_token, db):
         "/api/v1/requests/?start_date=invalid-date",
         headers=headers
     )
-    assert response.status_code == 200
\ No newline at end of file
+    assert response.status_code == 200
+@pytest.mark.asyncio
+async def test_request_list_total_modes(client, admin_token, db):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    for i in range(5):
+        request_data = {"full_name": f"Test User {i}", "national_id": 1000000 + i}
+        await client.post("/api/v1/requests/", json=request_data, headers=headers)
+
+    response = await client.get("/api/v1/requests/?limit=2", headers=headers)
+    data = response.json()
+    assert data["remaining"] == 3
+    assert len(data["results"]) == 2
+
+    # Offset past the end still reports nothing remaining
+    response = await client.get("/api/v1/requests/?skip=10&limit=2", headers=headers)
+    assert response.json() == {"remaining": 0, "next_cursor": None, "results": []}
+
+    response = await client.get("/api/v1/requests/?limit=2&include_total=false", headers=headers)
+    data = response.json()
+    assert data["remaining"] is None
+    assert data["next_cursor"] is not None
+    assert len(data["results"]) == 2
+
+    response = await client.get("/api/v1/requests/?limit=2&estimate_total=true", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert isinstance(data["remaining"], int)
+    assert len(data["results"]) == 2
+
+@pytest.mark.asyncio
+async def test_request_sparse_fieldsets(client, admin_token, db):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    request_data = {"full_name": "Test User", "national_id": 1000000}
+    response = await client.post("/api/v1/requests/", json=request_data, headers=headers)
+    request_id = response.json()["id"]
+
+    response = await client.get("/api/v1/requests/?fields=id,status", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["results"] == [{"id": request_id, "status": Status.PENDING.value}]
+
+    response = await client.get("/api/v1/requests/?fields=full_name&include=counter", headers=headers)
+    result = response.json()["results"][0]
+    assert set(result) == {"id", "full_name", "counter"}
+    assert result["counter"]["id"] == 1
+
+    # Full responses only join the relationships asked for
+    response = await client.get("/api/v1/requests/?include=counter", headers=headers)
+    result = response.json()["results"][0]
+    assert result["counter"]["id"] == 1
+    assert result["creator"] is None
+
+    response = await client.get(f"/api/v1/requests/{request_id}?fields=national_id&include=creator", headers=headers)
+    assert response.json() == {
+        "id": request_id,
+        "national_id": 1000000,
+        "creator": {"id": 1, "username": "admin", "role": "admin"},
+    }
+
+    response = await client.get(f"/api/v1/requests/{request_id}?include=counter", headers=headers)
+    result = response.json()
+    assert result["counter"]["id"] == 1
+    assert result["creator"] is None and result["assignee"] is None
+    assert result["full_name"] == "Test User"
+
+    response = await client.get("/api/v1/requests/?fields=password", headers=headers)
+    assert response.status_code == 400
+    response = await client.get(f"/api/v1/requests/{request_id}?include=everything", headers=headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_request_list_fast_path_matches_schema(client, admin_token, db):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    for i in range(3):
+        request_data = {"full_name": f"Test User {i}", "national_id": 1000000 + i, "notes": "ملاحظة"}
+        await client.post("/api/v1/requests/", json=request_data, headers=headers)
+    response = await client.post("/api/v1/assignees/", json={"full_name": "Doctor"}, headers=headers)
+    await client.put(
+        "/api/v1/requests/1",
+        json={"status": "completed", "assigned_to": response.json()["id"]},
+        headers=headers,
+    )
+
+    # The rows encoded straight from SQL must match what the response model produces
+    response = await client.get("/api/v1/requests/?order_by=id&limit=2", headers=headers)
+    assert response.status_code == 200
+    page = await crud_request.get_multi(db, order_by="id", limit=2, profile="detail")
+    expected = RequestListResponse.model_validate(page, from_attributes=True).model_dump(mode="json")
+    assert response.json() == expected
+    assert response.json()["results"][0]["assignee"]["full_name"] == "Doctor"
+
+    response = await client.get(
+        f"/api/v1/requests/?order_by=id&limit=2&cursor={response.json()['next_cursor']}", headers=headers
+    )
+    assert [r["national_id"] for r in response.json()["results"]] == [1000002]
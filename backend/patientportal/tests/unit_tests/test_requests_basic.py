@@ -1,5 +1,9 @@
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import event, func, select, update
+from app.models.counter_day import CounterDay
+from app.models.today_counter import TodayCounter
+from app.crud import crud_request, crud_todaycounter
 
 @pytest.mark.asyncio
 async def test_create_request(client, admin_token):
@@ -194,3 +198,121 @@ async def test_stats_requests(client, admin_token):
     assert data['completed'] == 0
     assert data['today'] == 0
 
+
+@pytest.mark.asyncio
+async def test_create_request_round_trips(client, create_guest, db):
+    request_data = {"full_name": "Kiosk User", "national_id": 123456789, "is_guest": True}
+    # Warm the guest user cache
+    await client.post("/api/v1/requests/", json=request_data, headers={"Authorization": "Bearer Guest"})
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        response = await client.post("/api/v1/requests/", json=request_data, headers={"Authorization": "Bearer Guest"})
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["creator"]["id"] == create_guest
+    assert data["counter"]["id"] == 2
+    assert data["status"] == "pending"
+    # The request and its counter in one INSERT, the users to notify are connected sockets
+    assert len(statements) == 1
+
+@pytest.mark.asyncio
+async def test_update_request_returning(client, admin_token, db):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    first = await client.post("/api/v1/assignees/", json={"full_name": "First"}, headers=headers)
+    second = await client.post("/api/v1/assignees/", json={"full_name": "Second"}, headers=headers)
+    response = await client.post(
+        "/api/v1/requests/", json={"full_name": "Test User", "national_id": 123456789}, headers=headers
+    )
+    request_id = response.json()["id"]
+
+    for assignee in (first, second):
+        response = await client.put(
+            f"/api/v1/requests/{request_id}",
+            json={"assigned_to": assignee.json()["id"], "notes": "seen"},
+            headers=headers
+        )
+        assert response.status_code == 200
+        data = response.json()
+        # Columns come from RETURNING, the already loaded relationships are kept in step
+        assert data["assignee"] == assignee.json()
+        assert data["status"] == "completed"
+        assert data["updated_at"] is not None
+        assert data["creator"]["username"] == "admin"
+        assert data["counter"]["id"] == 1
+
+    request = await crud_request.get(db, request_id)
+    with pytest.raises(ValueError):
+        await crud_request.update(db, db_obj=request, obj_in={"password": "x"}, fast=True)
+
+@pytest.mark.asyncio
+async def test_delete_request_single_statement(client, admin_token, assignee_id, db):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await client.post(
+        "/api/v1/requests/", json={"full_name": "Test User", "national_id": 123456789}, headers=headers
+    )
+    request_id = response.json()["id"]
+    await client.put(f"/api/v1/requests/{request_id}", json={"assigned_to": assignee_id}, headers=headers)
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        response = await client.delete(f"/api/v1/requests/{request_id}", headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["assignee"]["id"] == assignee_id
+    assert data["creator"]["username"] == "admin"
+    assert data["counter"]["id"] == 1
+    # The DELETE ... RETURNING (with the stats CTE) and nothing else
+    assert len(statements) == 1 and "DELETE FROM requests" in statements[0]
+
+    # The counter went with it (ON DELETE CASCADE)
+    result = await db.execute(select(func.count()).select_from(TodayCounter))
+    assert result.scalar() == 0
+    response = await client.delete(f"/api/v1/requests/{request_id}", headers=headers)
+    assert response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_ticket_numbers_per_day(client, admin_token, db):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    async def create(i):
+        response = await client.post(
+            "/api/v1/requests/", json={"full_name": f"User {i}", "national_id": 1000000 + i}, headers=headers
+        )
+        return response.json()["counter"]["id"]
+
+    assert [await create(0), await create(1)] == [1, 2]
+    bulk = {"requests": [{"full_name": f"Bulk {i}", "national_id": 2000000 + i} for i in range(3)]}
+    response = await client.post("/api/v1/requests/bulk", json=bulk, headers=headers)
+    assert [r["counter"]["id"] for r in response.json()["results"]] == [3, 4, 5]
+
+    # Move today's tickets to yesterday: numbering starts over
+    await db.execute(update(CounterDay).values(day=CounterDay.day - 1))
+    await db.execute(update(TodayCounter).values(day=TodayCounter.day - 1))
+    await db.commit()
+    assert await create(2) == 1
+
+    # Pruning drops the old tickets, not the requests
+    assert await crud_todaycounter.prune(db, keep_days=0) == 5
+    result = await db.execute(select(func.count()).select_from(TodayCounter))
+    assert result.scalar() == 1
+    response = await client.get("/api/v1/requests/?limit=10", headers=headers)
+    assert len(response.json()["results"]) == 6
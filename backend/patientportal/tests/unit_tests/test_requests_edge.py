@@ -1,6 +1,11 @@
+import csv
+import io
+import json
 import pytest
 from app.schemas.request import Status
 from app.core.config import settings
+from app.api.v1.endpoints.websocket_manager import websocket_manager
+from app.api.v1.endpoints.websocket_counter_manager import counter_websocket_manager
 @pytest.mark.asyncio
 async def test_request_with_special_characters(client, admin_token):
     headers = {"Authorization": f"Bearer {admin_token}"}
@@ -158,4 +163,194 @@ async def test_request_lifecycle(client, admin_token, verifier_token):
     # Verify request appears in stats
     stats_response = await client.get("/api/v1/requests/stats", headers=admin_headers)
     stats = stats_response.json()
-    assert stats["completed"] > 0
\ No newline at end of file
+    assert stats["completed"] > 0
+@pytest.mark.asyncio
+async def test_request_cursor_pagination(client, admin_token, assignee_id, db):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    request_ids = []
+    for i in range(25):
+        request_data = {
+            "full_name": f"Test User {i}",
+            "national_id": 1000000 + i,
+            "medical_number": 2000000 + i
+        }
+        response = await client.post("/api/v1/requests/", json=request_data, headers=headers)
+        request_ids.append(response.json()["id"])
+
+    # Complete a few so the page boundary crosses NULL and non-NULL updated_at values
+    for request_id in request_ids[::4]:
+        await client.put(
+            f"/api/v1/requests/{request_id}",
+            json={"assigned_to": assignee_id},
+            headers=headers
+        )
+
+    response = await client.get("/api/v1/requests/?limit=25", headers=headers)
+    expected = [r["id"] for r in response.json()["results"]]
+
+    seen = []
+    cursor = None
+    while True:
+        url = "/api/v1/requests/?limit=10"
+        if cursor:
+            url += f"&cursor={cursor}"
+        response = await client.get(url, headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        seen.extend(r["id"] for r in data["results"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            assert data["remaining"] == 0
+            break
+
+    assert seen == expected
+
+@pytest.mark.asyncio
+async def test_request_invalid_cursor(client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    response = await client.get("/api/v1/requests/?cursor=not-a-cursor", headers=headers)
+    assert response.status_code == 400
+
+    # A cursor is only valid for the ordering it was issued for
+    for i in range(3):
+        request_data = {"full_name": f"Test User {i}", "national_id": 1000000 + i}
+        await client.post("/api/v1/requests/", json=request_data, headers=headers)
+    response = await client.get("/api/v1/requests/?limit=1", headers=headers)
+    cursor = response.json()["next_cursor"]
+    response = await client.get(
+        f"/api/v1/requests/?limit=1&order_by=%2Bcreated_at&cursor={cursor}", headers=headers
+    )
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_request_export(client, admin_token, inserter_token, assignee_id, db, monkeypatch):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    for i in range(5):
+        request_data = {"full_name": f"Test, User {i}", "national_id": 1000000 + i}
+        await client.post("/api/v1/requests/", json=request_data, headers=headers)
+    await client.put("/api/v1/requests/2", json={"assigned_to": assignee_id}, headers=headers)
+
+    # Small batches so the export spans several cursor fetches
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+    response = await client.get("/api/v1/requests/export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["national_id"] for row in rows] == [1000000 + i for i in range(5)]
+    assert rows[1]["assignee"]["id"] == assignee_id
+    assert rows[0]["creator"]["username"] == "admin"
+
+    response = await client.get("/api/v1/requests/export?format=csv&status=completed", headers=headers)
+    assert response.status_code == 200
+    lines = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(lines) == 1
+    assert lines[0]["full_name"] == "Test, User 1"
+    assert lines[0]["assignee.id"] == str(assignee_id)
+
+    response = await client.get("/api/v1/requests/export?format=xml", headers=headers)
+    assert response.status_code == 400
+    response = await client.get(
+        "/api/v1/requests/export", headers={"Authorization": f"Bearer {inserter_token}"}
+    )
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_request_bulk_create(client, admin_token, inserter_token, monkeypatch):
+    events = []
+
+    async def capture(roles, message):
+        events.append(message)
+
+    monkeypatch.setattr(websocket_manager, "broadcast_to_roles", capture)
+    headers = {"Authorization": f"Bearer {inserter_token}"}
+
+    bulk = {"requests": [
+        {"full_name": f"Walk In {i}", "national_id": 1000000 + i, "notes": "secret"}
+        for i in range(50)
+    ]}
+    response = await client.post("/api/v1/requests/bulk", json=bulk, headers=headers)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["national_id"] for r in results] == [1000000 + i for i in range(50)]
+    assert all(r["notes"] is None and r["status"] == "pending" for r in results)
+    assert results[0]["creator"]["username"] == "inserter"
+    assert len({r["counter"]["id"] for r in results}) == 50
+
+    # The clients only know new_request, one per created request
+    assert {event["type"] for event in events} == {"new_request"}
+    assert [event["data"]["id"] for event in events] == [r["id"] for r in results]
+
+    response = await client.get(
+        f"/api/v1/requests/{results[-1]['id']}",
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.json()["counter"] == results[-1]["counter"]
+
+    response = await client.post("/api/v1/requests/bulk", json={"requests": []}, headers=headers)
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_request_bulk_update(client, admin_token, verifier_token, assignee_id, monkeypatch):
+    events = []
+    counter_events = []
+
+    async def capture(roles, message):
+        events.append(message)
+
+    async def capture_counter(message):
+        counter_events.append(message)
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    bulk = {"requests": [{"full_name": f"Walk In {i}", "national_id": 1000000 + i} for i in range(5)]}
+    response = await client.post("/api/v1/requests/bulk", json=bulk, headers=headers)
+    created = response.json()["results"]
+    ids = [r["id"] for r in created]
+
+    monkeypatch.setattr(websocket_manager, "broadcast_to_roles", capture)
+    monkeypatch.setattr(counter_websocket_manager, "broadcast", capture_counter)
+    verifier_headers = {"Authorization": f"Bearer {verifier_token}"}
+
+    await client.put(f"/api/v1/requests/{ids[0]}", json={"assigned_to": assignee_id}, headers=headers)
+    events.clear()
+    counter_events.clear()
+
+    response = await client.put(
+        "/api/v1/requests/bulk",
+        json={"ids": ids + [9999], "assigned_to": assignee_id, "notes": "done"},
+        headers=verifier_headers,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    # Completed requests are admin-only, unknown ids are skipped
+    assert data["skipped"] == [ids[0], 9999]
+    assert [r["id"] for r in data["results"]] == ids[1:]
+    assert all(r["status"] == "completed" and r["assigned_to"] == assignee_id for r in data["results"])
+    assert data["results"][0]["counter"] == created[1]["counter"]
+
+    assert [(event["type"], event["data"]["id"]) for event in events] == [("updated_request", i) for i in ids[1:]]
+    assert counter_events == [{"type": "counter_update", "last_counter": created[-1]["counter"]["id"]}]
+
+    response = await client.get(f"/api/v1/requests/{ids[1]}", headers=headers)
+    assert response.json()["assignee"]["id"] == assignee_id
+    assert response.json()["notes"] == "done"
+
+    response = await client.put(
+        "/api/v1/requests/bulk", json={"ids": ids, "assigned_to": 9999}, headers=headers
+    )
+    assert response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_noop_update_of_deleted_request_returns_none(client, admin_token, db):
+    from app.crud import crud_request
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await client.post("/api/v1/requests/", json={"full_name": "User", "national_id": 1000000}, headers=headers)
+    request_id = response.json()["id"]
+    request = await crud_request.get(db, id=request_id)
+    response = await client.delete(f"/api/v1/requests/{request_id}", headers=headers)
+    assert response.status_code == 200
+
+    assert await crud_request.update(db, db_obj=request, obj_in={}, fast=True) is None
@@ -121,4 +121,85 @@ async def test_role_based_permissions(client, admin_token, verifier_token, inser
         response = await client.delete(endpoint, headers=headers)
     
     print(response.json())
-    assert response.status_code == expected_status
\ No newline at end of file
+    assert response.status_code == expected_status
+
+@pytest.mark.asyncio
+async def test_stateless_roles_skip_user_lookup(client, verifier_token, monkeypatch):
+    from app.core.config import settings
+    from app.core.principal_cache import principal_cache
+
+    monkeypatch.setattr(settings, "AUTH_STATELESS_ROLES", True)
+    headers = {"Authorization": f"Bearer {verifier_token}"}
+
+    lookups_before = principal_cache.hits + principal_cache.misses
+    response = await client.get("/api/v1/requests/stats", headers=headers)
+    assert response.status_code == 200
+    assert principal_cache.hits + principal_cache.misses == lookups_before
+
+    response = await client.get("/api/v1/users/", headers=headers)
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_stateless_roles_revoked_on_role_change(client, verifier_token, db, monkeypatch):
+    from app.core.config import settings
+    from app.crud import crud_user
+
+    monkeypatch.setattr(settings, "AUTH_STATELESS_ROLES", True)
+    headers = {"Authorization": f"Bearer {verifier_token}"}
+
+    response = await client.get("/api/v1/requests/stats", headers=headers)
+    assert response.status_code == 200
+
+    user = await crud_user.get_by_username(db, username="verifier")
+    await crud_user.update(db, db_obj=user, obj_in={"role": Role.INSERTER})
+
+    response = await client.get("/api/v1/requests/stats", headers=headers)
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_stateless_roles_revoked_on_delete(client, admin_token, verifier_token, db, monkeypatch):
+    from app.core.config import settings
+    from app.crud import crud_user
+
+    monkeypatch.setattr(settings, "AUTH_STATELESS_ROLES", True)
+    admin_headers = {"Authorization": f"Bearer {admin_token}"}
+    headers = {"Authorization": f"Bearer {verifier_token}"}
+
+    user = await crud_user.get_by_username(db, username="verifier")
+    response = await client.delete(f"/api/v1/users/{user.id}", headers=admin_headers)
+    assert response.status_code == 200
+
+    response = await client.get("/api/v1/requests/stats", headers=headers)
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_update_deleted_user_returns_none(client, admin_token, verifier_token, db):
+    from app.crud import crud_user
+
+    user = await crud_user.get_by_username(db, username="verifier")
+    response = await client.delete(f"/api/v1/users/{user.id}", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+
+    assert await crud_user.update(db, db_obj=user, obj_in={"role": Role.INSERTER}) is None
+
+@pytest.mark.asyncio
+async def test_stateless_roles_with_revocation_from_another_worker(client, verifier_token, db, monkeypatch):
+    from app.core.config import settings
+    from app.core.token_revocation import token_revocations
+    from app.crud import crud_user
+
+    monkeypatch.setattr(settings, "AUTH_STATELESS_ROLES", True)
+    user = await crud_user.get_by_username(db, username="verifier")
+    version = await token_revocations.revoke(user.id)
+    response = await client.post("/api/v1/auth/login", data={"username": "verifier", "password": "verifierpass"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    # A worker that hasn't heard of the revocation yet checks the user row instead
+    monkeypatch.setitem(token_revocations._versions, user.id, 0)
+    response = await client.get("/api/v1/requests/stats", headers=headers)
+    assert response.status_code == 200
+
+    # A later revocation rejects the token
+    monkeypatch.setitem(token_revocations._versions, user.id, version + 1)
+    response = await client.get("/api/v1/requests/stats", headers=headers)
+    assert response.status_code == 401
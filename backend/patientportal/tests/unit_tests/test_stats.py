@@ -1,4 +1,9 @@
 import pytest
+from sqlalchemy import case, event, func, select
+from app.core.quantile_sketch import QuantileSketch
+from app.models.request import Request
+from app.models.request_turnaround_sketch import RequestTurnaroundSketch
+from app.schemas.request import Status
 
 @pytest.mark.asyncio
 async def test_request_stats(client, admin_token, db):
@@ -34,4 +39,257 @@ async def test_assignee_stats(client, admin_token, db):
     response = await client.get("/api/v1/assignees/stats", headers=headers)
     assert response.status_code == 200
     data = response.json()
-    assert "stats" in data
\ No newline at end of file
+    assert "stats" in data
+@pytest.mark.asyncio
+async def test_request_stats_rollups_follow_writes(client, admin_token, assignee_id, db):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    async def scanned():
+        # What the stats used to compute by scanning the requests table
+        result = await db.execute(
+            select(
+                func.count(Request.id),
+                func.count(case((Request.status == Status.COMPLETED, 1))),
+                func.count(case((Request.status == Status.PENDING, 1))),
+            )
+        )
+        total, completed, pending = result.one()
+        return {"total": total, "completed": completed, "pending": pending, "today": total}
+
+    async def stats():
+        response = await client.get("/api/v1/requests/stats", headers=headers)
+        assert response.status_code == 200
+        return response.json()
+
+    ids = []
+    for i in range(3):
+        response = await client.post(
+            "/api/v1/requests/", json={"full_name": f"User {i}", "national_id": 1000000 + i}, headers=headers
+        )
+        ids.append(response.json()["id"])
+    bulk = {"requests": [{"full_name": f"Bulk {i}", "national_id": 2000000 + i} for i in range(4)]}
+    response = await client.post("/api/v1/requests/bulk", json=bulk, headers=headers)
+    ids.extend(r["id"] for r in response.json()["results"])
+    assert await stats() == await scanned() == {"total": 7, "completed": 0, "pending": 7, "today": 7}
+
+    await client.put(f"/api/v1/requests/{ids[0]}", json={"assigned_to": assignee_id}, headers=headers)
+    # Re-completing an already completed request must not count it twice
+    await client.put("/api/v1/requests/bulk", json={"ids": ids[:4], "assigned_to": assignee_id}, headers=headers)
+    assert await stats() == await scanned() == {"total": 7, "completed": 4, "pending": 3, "today": 7}
+
+    await client.delete(f"/api/v1/requests/{ids[0]}", headers=headers)
+    await client.delete(f"/api/v1/requests/{ids[-1]}", headers=headers)
+    assert await stats() == await scanned() == {"total": 5, "completed": 3, "pending": 2, "today": 5}
+
+    # Totals run from January 1 of the given date's year, "today" is that day alone
+    response = await client.get("/api/v1/requests/stats?today_date=2000-01-01", headers=headers)
+    assert response.json() == {"total": 5, "completed": 3, "pending": 2, "today": 0}
+
+@pytest.mark.asyncio
+async def test_assignee_leaderboard(client, admin_token, db):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    assignee_ids = []
+    for name in ("First", "Second", "Third"):
+        response = await client.post("/api/v1/assignees/", json={"full_name": name}, headers=headers)
+        assignee_ids.append(response.json()["id"])
+    bulk = {"requests": [{"full_name": f"User {i}", "national_id": 1000000 + i} for i in range(3)]}
+    response = await client.post("/api/v1/requests/bulk", json=bulk, headers=headers)
+    request_ids = [r["id"] for r in response.json()["results"]]
+
+    await client.put(
+        "/api/v1/requests/bulk", json={"ids": request_ids[:2], "assigned_to": assignee_ids[1]}, headers=headers
+    )
+    response = await client.get("/api/v1/assignees/stats?order=completed_desc&limit=2", headers=headers)
+    assert response.json()["stats"] == [
+        {"full_name": "Second", "completed": 2},
+        {"full_name": "First", "completed": 0},
+    ]
+
+    # Served from the cache until a request is completed
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        await client.get("/api/v1/assignees/stats?order=completed_desc&limit=2", headers=headers)
+        await client.get("/api/v1/assignees/stats", headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    # One GROUP BY for the uncached page, whatever the number of assignees
+    assert len(statements) == 1
+
+    await client.put(f"/api/v1/requests/{request_ids[2]}", json={"assigned_to": assignee_ids[2]}, headers=headers)
+    response = await client.get("/api/v1/assignees/stats", headers=headers)
+    assert [s["completed"] for s in response.json()["stats"]] == [0, 2, 1]
+
+    # Windows are on completion time
+    response = await client.get("/api/v1/assignees/stats?end_date=2000-01-01", headers=headers)
+    assert [s["completed"] for s in response.json()["stats"]] == [0, 0, 0]
+    response = await client.get("/api/v1/assignees/stats?order=fastest", headers=headers)
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_concurrent_completions_counted_once(client, admin_token, db):
+    import asyncio
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from app.core.config import settings
+    from app.crud import crud_request
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await client.post(
+        "/api/v1/requests/", json={"full_name": "User", "national_id": 1000000}, headers=headers
+    )
+    request_id = response.json()["id"]
+
+    # Two workers read the pending request, then both complete it
+    engine = create_async_engine(str(settings.DATABASE_URL))
+    try:
+        sessions = [AsyncSession(engine, expire_on_commit=False) for _ in range(2)]
+        requests = [await session.get(Request, request_id) for session in sessions]
+        await asyncio.gather(*[
+            crud_request.update(session, db_obj=request, obj_in={"status": Status.COMPLETED}, fast=True)
+            for session, request in zip(sessions, requests)
+        ])
+        for session in sessions:
+            await session.close()
+    finally:
+        await engine.dispose()
+
+    response = await client.get("/api/v1/requests/stats", headers=headers)
+    assert response.json() == {"total": 1, "completed": 1, "pending": 0, "today": 1}
+    response = await client.get("/api/v1/requests/stats/timeseries", headers=headers)
+    assert response.json()["results"][-1]["completed"] == 1
+
+@pytest.mark.asyncio
+async def test_request_timeseries(client, admin_token, assignee_id, db):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    ids = []
+    for i in range(2):
+        response = await client.post(
+            "/api/v1/requests/", json={"full_name": f"User {i}", "national_id": 1000000 + i}, headers=headers
+        )
+        ids.append(response.json()["id"])
+    bulk = {"requests": [{"full_name": f"Bulk {i}", "national_id": 2000000 + i} for i in range(2)]}
+    await client.post("/api/v1/requests/bulk", json=bulk, headers=headers)
+    await client.put(f"/api/v1/requests/{ids[0]}", json={"assigned_to": assignee_id}, headers=headers)
+    # Completing it again isn't a second completion
+    await client.put("/api/v1/requests/bulk", json={"ids": ids, "assigned_to": assignee_id}, headers=headers)
+
+    response = await client.get("/api/v1/requests/stats/timeseries", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    data = response.json()
+    assert data["granularity"] == "hour"
+    assert len(data["results"]) == 25
+    current = data["results"][-1]
+    assert (current["created"], current["completed"]) == (4, 2)
+    assert current["mean_turnaround_seconds"] >= 0
+    assert all(bucket["created"] == 0 for bucket in data["results"][:-1])
+
+    # Deleting doesn't rewrite what happened
+    await client.delete(f"/api/v1/requests/{ids[0]}", headers=headers)
+    response = await client.get("/api/v1/requests/stats/timeseries?granularity=day", headers=headers)
+    assert [(b["created"], b["completed"]) for b in response.json()["results"][-1:]] == [(4, 2)]
+
+    # Finished ranges are immutable, cacheable and served without a query
+    past = "/api/v1/requests/stats/timeseries?granularity=day&start=2000-01-01&end=2000-01-08"
+    response = await client.get(past, headers=headers)
+    assert response.headers["Cache-Control"] == "private, max-age=31536000, immutable"
+    assert [b["created"] for b in response.json()["results"]] == [0] * 7
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        assert (await client.get(past, headers=headers)).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert statements == []
+
+    response = await client.get("/api/v1/requests/stats/timeseries?granularity=week", headers=headers)
+    assert response.status_code == 400
+    response = await client.get(
+        "/api/v1/requests/stats/timeseries?start=2000-01-01&end=2001-01-01", headers=headers
+    )
+    assert response.status_code == 400
+
+def test_quantile_sketch_accuracy():
+    sketch, other = QuantileSketch(0.01), QuantileSketch(0.01)
+    values = [1.5 ** (i % 40) for i in range(10000)]
+    for i, value in enumerate(values):
+        (sketch if i % 2 else other).add(value)
+    # Merging halves gives the sketch of the whole
+    sketch.merge(other)
+    assert sketch.count == len(values)
+
+    values.sort()
+    for q in (0.5, 0.9, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(sketch.quantile(q) - exact) <= 0.01 * exact
+    assert QuantileSketch().quantile(0.5) is None
+
+@pytest.mark.asyncio
+async def test_request_turnaround(client, admin_token, assignee_id, db):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    async def turnaround():
+        response = await client.get("/api/v1/requests/stats/turnaround", headers=headers)
+        assert response.status_code == 200
+        return response.json()
+
+    # Completions still sketched in memory by earlier tests get flushed here
+    before = (await turnaround())["today"]["count"]
+    ids = []
+    for i in range(3):
+        response = await client.post(
+            "/api/v1/requests/", json={"full_name": f"User {i}", "national_id": 1000000 + i}, headers=headers
+        )
+        ids.append(response.json()["id"])
+    await client.put(f"/api/v1/requests/{ids[0]}", json={"assigned_to": assignee_id}, headers=headers)
+    await client.put("/api/v1/requests/bulk", json={"ids": ids[:2], "assigned_to": assignee_id}, headers=headers)
+
+    data = await turnaround()
+    assert data["today"] == data["last_7_days"]
+    assert data["today"]["count"] == before + 2
+    # Completed right away
+    assert data["today"]["p99"] == 0.0
+
+    # Served from the sketch: one row per bucket, not per request
+    result = await db.execute(select(func.count()).select_from(RequestTurnaroundSketch))
+    assert result.scalar() == 1
+
+@pytest.mark.asyncio
+async def test_turnaround_skips_failed_commits(client, admin_token, db, monkeypatch):
+    from app.crud import crud_request, crud_request_turnaround
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await client.post(
+        "/api/v1/requests/", json={"full_name": "User", "national_id": 1000000}, headers=headers
+    )
+    request_id = response.json()["id"]
+    request = await crud_request.get(db, id=request_id)
+    added = []
+    monkeypatch.setattr(crud_request_turnaround, "add", lambda *sample: added.append(sample))
+
+    async def failing_commit():
+        raise RuntimeError("commit failed")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(db, "commit", failing_commit)
+        with pytest.raises(RuntimeError):
+            await crud_request.update(db, db_obj=request, obj_in={"status": Status.COMPLETED}, fast=True)
+    await db.rollback()
+    assert added == []
+
+    request = await crud_request.get(db, id=request_id)
+    await crud_request.update(db, db_obj=request, obj_in={"status": Status.COMPLETED}, fast=True)
+    assert len(added) == 1
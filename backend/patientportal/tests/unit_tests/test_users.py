@@ -125,4 +125,43 @@ async def test_users_pagination_over_limit(client, admin_token, db):
     # Test over the limit which should return an error
     response = await client.get(f"/api/v1/users/?limit={int(settings.MAX_FETCH_LIMIT) + 1}", headers=headers)
     assert response.status_code == 400
-    assert "Limit must be less than or equal to" in response.json()["detail"]
\ No newline at end of file
+    assert "Limit must be less than or equal to" in response.json()["detail"]
+
+@pytest.mark.asyncio
+async def test_deleted_user_token_rejected_after_cache(client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    user_data = {
+        "username": "Cached User",
+        "password": "Test Password",
+        "role": "verifier"
+    }
+    create_response = await client.post("/api/v1/users/", json=user_data, headers=headers)
+    user_id = create_response.json()["id"]
+
+    login_response = await client.post(
+        "/api/v1/auth/login",
+        data={"username": "Cached User", "password": "Test Password"},
+    )
+    user_headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+    # Twice, so the second call is served from the principal cache
+    for _ in range(2):
+        response = await client.get("/api/v1/users/me", headers=user_headers)
+        assert response.status_code == 200
+
+    response = await client.delete(f"/api/v1/users/{user_id}", headers=headers)
+    assert response.status_code == 200
+
+    response = await client.get("/api/v1/users/me", headers=user_headers)
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_principal_cache_metrics(client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    before = (await client.get("/api/v1/metrics/", headers=headers)).json()["principal_cache"]
+    await client.get("/api/v1/users/me", headers=headers)
+    after = (await client.get("/api/v1/metrics/", headers=headers)).json()["principal_cache"]
+
+    assert after["hits"] > before["hits"]
+    assert after["size"] >= 1
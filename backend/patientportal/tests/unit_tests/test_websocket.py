@@ -5,6 +5,11 @@ import asyncio
 from async_asgi_testclient import TestClient # We need to use this instead of httpx.AsyncClient, as it doesn't support websockets
 import json
 from app.main import app
+from app.core.roles import Role
+from app.crud import crud_user
+from app.api.v1.endpoints import websocket_manager as manager_module
+from app.api.v1.endpoints.websocket_manager import websocket_manager
+from app.api.v1.endpoints.websocket_sender import ConnectionSender, SendStats, encode_message
 
 @pytest.mark.asyncio
 async def test_websocket_connection_verifier(client, inserter_token, verifier_token, assignee_id, db):
@@ -162,4 +167,139 @@ async def test_websocket_invalid(client, create_expired_token, db):
             async with test_client.websocket_connect(f"/api/v1/ws?token={create_expired_token}") as ws:
                 pytest.fail("Connection should have failed with invalid token")
         except Exception as e:
-            assert True 
\ No newline at end of file
+            assert True 
+@pytest.mark.asyncio
+async def test_websocket_role_registry(client, admin_token, verifier_token, db):
+    async with TestClient(app) as test_client:
+        async with test_client.websocket_connect(f"/api/v1/ws?token={verifier_token}") as ws:
+            # Indexed by role when connecting
+            assert len(websocket_manager.users_by_role["verifier"]) == 1
+            verifier_id = next(iter(websocket_manager.users_by_role["verifier"]))
+
+            headers = {"Authorization": f"Bearer {admin_token}"}
+            await client.post(
+                "/api/v1/requests/", json={"full_name": "Test User", "national_id": 123456789}, headers=headers
+            )
+            data = await ws.receive_json()
+            assert data["type"] == "new_request"
+
+            # A role change re-indexes the open sockets under the new role
+            user = await crud_user.get(db, id=verifier_id)
+            await crud_user.update(db, db_obj=user, obj_in={"role": Role.INSERTER})
+            assert verifier_id in websocket_manager.users_by_role["inserter"]
+            assert not websocket_manager.users_by_role["verifier"]
+            await client.post(
+                "/api/v1/requests/", json={"full_name": "Other User", "national_id": 123456780, "notes": "private"},
+                headers=headers,
+            )
+            data = await ws.receive_json()
+            assert data["type"] == "new_request"
+            assert data["data"]["notes"] == "private"
+
+            # Deleted users stop getting broadcasts on their open sockets
+            response = await client.delete(f"/api/v1/users/{verifier_id}", headers=headers)
+            assert response.status_code == 200
+            assert not websocket_manager.users_by_role["verifier"]
+    assert verifier_id not in websocket_manager.active_connections
+
+
+class StalledSocket:
+    # A client that accepts and then never reads, sends just pile up
+    def __init__(self, stall=True):
+        self.stall = stall
+        self.sent = []
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame):
+        if self.stall:
+            await asyncio.Event().wait()
+        self.sent.append(json.loads(frame))
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+def test_unknown_slow_consumer_policy_fails_at_startup(monkeypatch):
+    from pydantic import ValidationError
+    from app.core.config import Settings
+
+    monkeypatch.setenv("WS_SLOW_CONSUMER_POLICY", "dropoldest")
+    with pytest.raises(ValidationError):
+        Settings()
+
+@pytest.mark.asyncio
+async def test_slow_consumer_policies():
+    closed = []
+    socket = StalledSocket(stall=False)
+    sender = ConnectionSender(socket, max_size=2, policy="drop_oldest", stats=SendStats(), on_close=closed.append)
+    for i in range(4):
+        sender.send(json.dumps({"n": i}))
+    for _ in range(5):
+        await asyncio.sleep(0)
+    # The oldest messages made room for the newest
+    assert socket.sent == [{"n": 2}, {"n": 3}]
+    assert sender.stats.dropped == 2 and sender.stats.sent == 2
+    sender.close()
+
+    socket = StalledSocket()
+    sender = ConnectionSender(socket, max_size=1, policy="disconnect", stats=SendStats(), on_close=closed.append)
+    sender.send('{"n":0}')
+    sender.send('{"n":1}')
+    await asyncio.sleep(0)
+    assert sender.closed and closed[-1] is socket and socket.close_code == 1013
+    assert sender.stats.slow_disconnects == 1
+
+@pytest.mark.asyncio
+async def test_broadcast_does_not_wait_for_slow_clients(client, admin_token, db):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    socket = StalledSocket()
+    await websocket_manager.connect(socket, 0, "admin")
+    try:
+        for i in range(2):
+            response = await asyncio.wait_for(
+                client.post(
+                    "/api/v1/requests/", json={"full_name": f"User {i}", "national_id": 1000000 + i}, headers=headers
+                ),
+                timeout=5,
+            )
+            assert response.status_code == 200
+        # The first one is stuck in send_json, the second waits in the queue
+        stats = (await client.get("/api/v1/metrics/", headers=headers)).json()["websockets"]
+        assert stats["connections"] == 1 and stats["queued"] == 1
+    finally:
+        await websocket_manager.disconnect(socket, 0)
+    assert socket not in websocket_manager.senders
+
+@pytest.mark.asyncio
+async def test_broadcast_encoded_once(client, admin_token, monkeypatch, db):
+    encoded = []
+
+    def counting_encode(message):
+        encoded.append(message)
+        return encode_message(message)
+
+    monkeypatch.setattr(manager_module, "encode_message", counting_encode)
+    sockets = {user_id: StalledSocket(stall=False) for user_id in range(-6, 0)}
+    for user_id, socket in sockets.items():
+        await websocket_manager.connect(socket, user_id, "inserter" if user_id % 2 else "admin")
+    try:
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        response = await client.post(
+            "/api/v1/requests/",
+            json={"full_name": "Test User", "national_id": 123456789, "notes": "Allergic"},
+            headers=headers,
+        )
+        assert response.status_code == 200
+        for _ in range(5):
+            await asyncio.sleep(0)
+    finally:
+        for user_id, socket in sockets.items():
+            await websocket_manager.disconnect(socket, user_id)
+
+    # Six sockets in two roles, one encoding; every role sees the notes
+    assert len(encoded) == 1
+    for socket in sockets.values():
+        [message] = socket.sent
+        assert message["data"]["notes"] == "Allergic"